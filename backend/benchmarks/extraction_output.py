@@ -0,0 +1,92 @@
+"""
+Compare the full info dump an extraction used to parse against the lean
+output printed from LEAN_TEMPLATE: bytes read from yt-dlp per video, and the
+time to parse them.
+
+The info is built to the shape and size of a real watch page's: two dozen
+formats with signed URLs, the thumbnail ladder, and automatic captions in
+every language YouTube translates to, which is most of the bytes.
+
+    cd backend && python -m benchmarks.extraction_output
+"""
+
+import json
+import random
+import string
+import timeit
+
+import yt_dlp
+
+from source_providers.youtube import LEAN_TEMPLATE, select_stream_url
+
+FORMATS = 24
+THUMBNAILS = 42
+CAPTION_LANGUAGES = 157
+CAPTION_FORMATS = ("json3", "srv1", "srv2", "srv3", "ttml", "srt", "vtt")
+ROUNDS = 200
+
+
+def signed_url(rng: random.Random, host: str, length: int) -> str:
+    query = "".join(rng.choices(string.ascii_letters + string.digits + "%&=_-", k=length))
+    return f"https://{host}/videoplayback?expire=1999999999&{query}"
+
+
+def sample_info(seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    video_id = "".join(rng.choices(string.ascii_letters + string.digits + "-_", k=11))
+    formats = [
+        {
+            "format_id": str(100 + i),
+            "url": signed_url(rng, "rr3---sn-abc.googlevideo.com", 900),
+            "ext": rng.choice(("mp4", "webm", "m4a")),
+            "protocol": "https",
+            "width": rng.choice((256, 426, 640, 854, 1280, 1920)),
+            "height": rng.choice((144, 240, 360, 480, 720, 1080)),
+            "vcodec": "avc1.4d401e",
+            "acodec": "mp4a.40.2",
+            "filesize": rng.randint(1_000_000, 90_000_000),
+            "tbr": rng.uniform(50, 3000),
+            "http_headers": {"User-Agent": "Mozilla/5.0", "Accept": "*/*", "Accept-Language": "en-us,en;q=0.5"},
+        }
+        for i in range(FORMATS)
+    ]
+    selected = formats[-1]
+    return {
+        "id": video_id,
+        "title": "Bohemian Rhapsody (Karaoke Version)",
+        "channel": "Sing King",
+        "duration": 359,
+        "formats": formats,
+        "thumbnails": [
+            {"url": f"https://i.ytimg.com/vi/{video_id}/{i}.jpg?sqp={'x' * 60}", "preference": -i, "id": str(i)}
+            for i in range(THUMBNAILS)
+        ],
+        "automatic_captions": {
+            f"l{language}": [
+                {"ext": ext, "url": signed_url(rng, "www.youtube.com/api/timedtext", 400), "name": f"Language {language}"}
+                for ext in CAPTION_FORMATS
+            ]
+            for language in range(CAPTION_LANGUAGES)
+        },
+        "requested_downloads": [{**selected}],
+        **{key: selected[key] for key in ("format_id", "url", "ext", "protocol", "width", "height")},
+    }
+
+
+def main():
+    info = sample_info()
+    with yt_dlp.YoutubeDL({"quiet": True}) as ydl:
+        full = json.dumps(ydl.sanitize_info(info))
+        lean = ydl.evaluate_outtmpl(LEAN_TEMPLATE, info)
+
+    assert select_stream_url(json.loads(full)) == select_stream_url(json.loads(lean))
+
+    print(f"one video, {FORMATS} formats, captions in {CAPTION_LANGUAGES} languages")
+    print(f"  stdout bytes:   full {len(full.encode()):>8}   lean {len(lean.encode()):>6}")
+    for label, output in (("full parse", full), ("lean parse", lean)):
+        seconds = min(timeit.repeat(lambda: json.loads(output), number=ROUNDS, repeat=5)) / ROUNDS
+        print(f"  {label + ':':<16}{seconds * 1e3:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Compare score_candidates against the per-marker scorer it replaced, on result
+lists from 60 candidates, one full search, to 10k. Scores are checked equal
+first, on the sample lists and on titles built to overlap the markers, and
+for queries whose tokens repeat, are markers themselves, or are missing.
+
+    cd backend && python -m benchmarks.ranking
+"""
+
+import math
+import random
+import timeit
+
+from core.ranking import (
+    KARAOKE_TITLE_MARKERS,
+    KARAOKE_UPLOADER_MARKERS,
+    KARAOKE_UPLOADER_WEIGHT,
+    NON_KARAOKE_PENALTY,
+    NON_KARAOKE_TITLE_MARKERS,
+    POPULARITY_CEILING,
+    POPULARITY_WEIGHT,
+    POSITION_PENALTY,
+    QUERY_MATCH_WEIGHT,
+    TITLE_MARKER_WEIGHT,
+    VERIFIED_WEIGHT,
+    query_match_ratio,
+    query_tokens,
+    score_candidates,
+)
+from core.search import KaraokeEntry, RankingSignals, SearchCandidate
+
+SIZES = (60, 600, 10_000)
+QUERY = "bohemian rhapsody queen"
+CHECKED_QUERIES = (QUERY, "queen karaoke queen", "sing along instrumental", "")
+
+WORDS = ("bohemian", "rhapsody", "queen", "love", "night", "halo", "shallow", "dance", "(hd)", "-", "2019")
+MARKERS = KARAOKE_TITLE_MARKERS + NON_KARAOKE_TITLE_MARKERS
+CHANNELS = ("Sing King", "KaraFun", "Queen Official", "Zoom Karaoke", "Random Uploads", "Videoke Hits")
+
+
+def reference_score(candidate: SearchCandidate, tokens: list[str], curated: bool = False) -> float:
+    """score_candidate as it was: one substring scan per marker."""
+    entry = candidate.entry
+    signals = candidate.signals
+    title = entry.title.lower()
+    uploader = entry.uploader.lower()
+
+    score = QUERY_MATCH_WEIGHT * query_match_ratio(title, tokens)
+    score += TITLE_MARKER_WEIGHT * sum(1 for marker in KARAOKE_TITLE_MARKERS if marker in title)
+    score -= NON_KARAOKE_PENALTY * sum(1 for marker in NON_KARAOKE_TITLE_MARKERS if marker in title)
+
+    if curated or any(marker in uploader for marker in KARAOKE_UPLOADER_MARKERS):
+        score += KARAOKE_UPLOADER_WEIGHT
+
+    if signals.verified:
+        score += VERIFIED_WEIGHT
+
+    score += POPULARITY_WEIGHT * min(math.log10(signals.popularity + 1), POPULARITY_CEILING)
+
+    return score - POSITION_PENALTY * signals.position
+
+
+def sample_candidates(count: int, seed: int = 7) -> list[SearchCandidate]:
+    rng = random.Random(seed)
+    candidates = []
+    for position in range(count):
+        parts = rng.choices(WORDS, k=rng.randint(2, 6)) + rng.sample(MARKERS, k=rng.randint(0, 3))
+        rng.shuffle(parts)
+        channel = rng.choice(CHANNELS)
+        candidates.append(SearchCandidate(
+            entry=KaraokeEntry(
+                id=f"v{position}",
+                title=" ".join(parts).title(),
+                artist=channel,
+                source="youtube",
+                uploader=channel,
+                duration=240.0,
+            ),
+            signals=RankingSignals(
+                position=position,
+                popularity=rng.choice((0, rng.randint(1, 10 ** 9))),
+                verified=rng.random() < 0.3,
+            ),
+        ))
+    return candidates
+
+
+def overlapping_candidates() -> list[SearchCandidate]:
+    """Markers run into, inside and after each other, and repeated."""
+    titles = [
+        "karaoke version", "sing-along karaoke", "no vocalyrics on screen", "how tofficial video",
+        "official music videofficial lyric video", "full albumedley nonstop", "(lyrics)(lyrics) reaction",
+        "instrumentalive performance", "behind the scenesing along", "karaokekaraoke", "",
+    ]
+    return [
+        SearchCandidate(
+            entry=KaraokeEntry(id=str(i), title=title, artist="", source="youtube", uploader=uploader, duration=1.0),
+            signals=RankingSignals(position=i, popularity=i * 997),
+        )
+        for i, title in enumerate(titles)
+        for uploader in ("", "KaraFun Sing Along")
+    ]
+
+
+def main():
+    for query in CHECKED_QUERIES:
+        tokens = query_tokens(query)
+        for candidates in (overlapping_candidates(), sample_candidates(SIZES[-1]), sample_candidates(1)):
+            for curated in (False, True):
+                expected = [reference_score(candidate, tokens, curated) for candidate in candidates]
+                assert score_candidates(candidates, tokens, curated) == expected, query
+
+    tokens = query_tokens(QUERY)
+    print(f"query {QUERY!r}")
+    for size in SIZES:
+        candidates = sample_candidates(size)
+        rounds = max(1, 60_000 // size)
+        reference = min(timeit.repeat(
+            lambda: [reference_score(candidate, tokens) for candidate in candidates], number=rounds, repeat=5
+        )) / rounds
+        batch = min(timeit.repeat(lambda: score_candidates(candidates, tokens), number=rounds, repeat=5)) / rounds
+        print(f"  {size:>6} candidates:   per marker {reference * 1e3:>8.3f} ms   batch {batch * 1e3:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare the cache's per-entry record encoding against the JSON document per
+query it replaced: bytes stored per query, and the time to decode one page.
+
+    cd backend && python -m benchmarks.search_cache_encoding
+"""
+
+import json
+import random
+import timeit
+
+from cache_codec import decode_records, encode_record
+
+RESULTS_PER_QUERY = 60
+PAGE_SIZE = 12
+ROUNDS = 2000
+
+WORDS = (
+    "love", "heart", "night", "dance", "forever", "tonight", "dream", "fire",
+    "rain", "home", "baby", "light", "shallow", "rhapsody", "halo", "believe",
+)
+CHANNELS = ("Sing King", "KaraFun", "Zoom Karaoke", "Stingray Karaoke", "Musisi Karaoke")
+
+
+def sample_entries(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(count):
+        video_id = "".join(rng.choices("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_", k=11))
+        channel = rng.choice(CHANNELS)
+        title = " ".join(rng.choice(WORDS).title() for _ in range(rng.randint(2, 5)))
+        entries.append({
+            "id": video_id,
+            "title": f"{title} (Karaoke Version)",
+            "artist": channel,
+            "video_url": None,
+            "source": "youtube",
+            "uploader": channel,
+            "duration": float(rng.randint(150, 330)),
+            "thumbnail_url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg",
+        })
+    return entries
+
+
+def main():
+    entries = sample_entries(RESULTS_PER_QUERY)
+
+    as_json = json.dumps({"entries": entries})
+    as_records = [encode_record(entry) for entry in entries]
+
+    def json_page():
+        return json.loads(as_json)["entries"][:PAGE_SIZE]
+
+    def records_page():
+        # What a page read from SQLite decodes: its own rows and nothing else.
+        return decode_records(as_records[:PAGE_SIZE])
+
+    assert json_page() == records_page()
+
+    print(f"{RESULTS_PER_QUERY} results, page of {PAGE_SIZE}")
+    print(f"  stored bytes:   json {len(as_json.encode()):>7}   records {sum(map(len, as_records)):>7}")
+    for label, fn in (
+        ("json page", json_page),
+        ("records page", records_page),
+    ):
+        seconds = min(timeit.repeat(fn, number=ROUNDS, repeat=5)) / ROUNDS
+        print(f"  {label + ':':<16}{seconds * 1e6:>8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare a YoutubeDL built per search against one kept per search thread by
+SearchClients: the latency of an extraction against a local stand-in server,
+so the network is not what gets measured.
+
+The stand-in serves a small media file that yt-dlp's generic extractor
+resolves with one request, which leaves client setup, extractor lookup and
+connection handling as most of the cost. A real search pays the same setup
+on top of a slower round trip to YouTube.
+
+    cd backend && python -m benchmarks.search_clients
+"""
+
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yt_dlp
+
+from source_providers.youtube import SearchClients, YTKaraokeSourceProvider
+
+ROUNDS = 60
+WARMUP = 5
+MEDIA = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 4096
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _headers(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(MEDIA)))
+        self.end_headers()
+
+    def do_HEAD(self):
+        self._headers()
+
+    def do_GET(self):
+        self._headers()
+        self.wfile.write(MEDIA)
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(label: str, extract, url: str):
+    for _ in range(WARMUP):
+        extract(url)
+
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        info = extract(url)
+        timings.append(time.perf_counter() - started)
+        assert info and info.get("url"), info
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {label + ':':<18}median {statistics.median(timings) * 1e3:>7.1f} ms   p95 {p95 * 1e3:>7.1f} ms")
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/song.mp4"
+
+    opts = YTKaraokeSourceProvider()._get_ydl_opts()
+
+    def fresh(url):
+        # What _search_videos did before: a client built and closed per search.
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    clients = SearchClients(max_uses=ROUNDS + WARMUP, max_age_seconds=3600)
+
+    def kept(url):
+        return clients.search(opts, url)
+
+    print(f"{ROUNDS} extractions against {url}")
+    try:
+        measure("client per search", fresh, url)
+        measure("kept client", kept, url)
+    finally:
+        server.shutdown()
+    print(f"  kept clients: {clients.stats}")
+
+
+if __name__ == "__main__":
+    main()
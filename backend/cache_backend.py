@@ -0,0 +1,260 @@
+"""
+What the service needs from a cache, and the pieces every backend shares.
+
+The SQLite CacheStore keeps the cache inside one process. A backend on the
+network lets several workers, or hosts, share resolved URLs and search results
+instead of each paying for its own yt-dlp calls. config.CACHE_BACKEND picks one;
+see create_cache_store in cache_store.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Protocol
+
+# Distinguishes "not held" from a held value that is itself falsy, such as the
+# empty string cached for an unavailable video.
+MISSING = object()
+
+
+class MemoryTier:
+    """
+    Bounded LRU of decoded values, kept in front of SQLite.
+
+    A room paging through one query, or a queue asking for the same song's URL,
+    would otherwise run a query and decode the whole row every time. Each item
+    carries the expiry of the row it mirrors, so this tier never serves
+    anything SQLite would already have refused.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(0, max_entries)
+        self._items: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable, now: Optional[float] = None) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return MISSING
+
+        value, expires_at = item
+        if expires_at <= (now if now is not None else time.time()):
+            del self._items[key]
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any, expires_at: float):
+        if self.max_entries == 0:
+            return
+
+        self._items[key] = (value, expires_at)
+        self._items.move_to_end(key)
+
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: Hashable):
+        self._items.pop(key, None)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Drop every expired item rather than waiting for a read to find it."""
+        now = now if now is not None else time.time()
+        expired = [key for key, (_, expires_at) in self._items.items() if expires_at <= now]
+        for key in expired:
+            del self._items[key]
+        self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        self._items.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._items),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SearchPage(NamedTuple):
+    entries: list[dict]
+    total: int
+    # Past its TTL but inside the stale grace window: serve it, and refresh it.
+    stale: bool = False
+    # How many results per source the list was built from, or None once the
+    # sources have been asked for everything they will give.
+    depth: Optional[int] = None
+    # The ranking version the list was ordered under, "" if it was stored
+    # without one.
+    ranking: str = ""
+
+
+class CachedCandidates(NamedTuple):
+    """
+    Everything the sources returned for a query, singable or not, as
+    {"tier", "entry", "signals"} records in the order they were first fetched.
+    A tier is the fetch that added the candidate: a deeper fetch adds a tier
+    rather than reordering the ones before it.
+    """
+
+    records: list[dict]
+    fresh_until: float
+    depth: Optional[int] = None
+
+
+class CachedSearch:
+    """
+    One query's ranked list, held in the memory tier as far as it has been
+    read. Pages are filled in as they are fetched from SQLite, so a room paging
+    forward reads each entry from disk once.
+    """
+
+    def __init__(self, total: int, fresh_until: float, depth: Optional[int] = None, ranking: str = ""):
+        self.total = total
+        self.fresh_until = fresh_until
+        self.depth = depth
+        self.ranking = ranking
+        self._records: list[Optional[dict]] = [None] * total
+        # What the list was ranked from, as CachedCandidates records. Held by
+        # a backend with nowhere else to keep them, and by a write until it lands.
+        self.candidates: Optional[list[dict]] = None
+
+    @classmethod
+    def complete(
+        cls, records: list[dict], fresh_until: float, depth: Optional[int] = None, ranking: str = ""
+    ) -> "CachedSearch":
+        """Every record of the list in hand, however deep it was fetched."""
+        held = cls(len(records), fresh_until, depth, ranking)
+        held._records = [dict(record) for record in records]
+        return held
+
+    def with_candidates(self, candidates: list[dict]) -> "CachedSearch":
+        """The same list, sharing its records, also holding copies of `candidates`."""
+        held = CachedSearch(0, self.fresh_until, self.depth, self.ranking)
+        held.total = self.total
+        held._records = self._records
+        held.candidates = copy_candidates(candidates)
+        return held
+
+    def held_candidates(self) -> Optional["CachedCandidates"]:
+        """What the list was ranked from, as copies, or None if it holds none."""
+        if not self.candidates:
+            return None
+        return CachedCandidates(copy_candidates(self.candidates), self.fresh_until, self.depth)
+
+    def fill(self, offset: int, records: list[dict]):
+        self._records[offset:offset + len(records)] = records
+
+    def page(self, offset: int, limit: int) -> Optional[list[dict]]:
+        """The page, or None while any of it has yet to be read."""
+        window = self._records[offset:offset + limit]
+        if any(record is None for record in window):
+            return None
+        # Copies, so a caller changing what it was given cannot change the cache.
+        return [dict(record) for record in window]
+
+
+def copy_candidates(candidates: list[dict]) -> list[dict]:
+    return [
+        {"tier": record["tier"], "entry": dict(record["entry"]), "signals": dict(record["signals"])}
+        for record in candidates
+    ]
+
+
+def search_key(query: str, scope: str) -> str:
+    """The identity of a cached ranked list, shared by every backend."""
+    return hashlib.sha256(f"{scope}|{query.lower()}".encode()).hexdigest()
+
+
+def search_page(entries: list[dict], total: int, fresh_until: float, now: float,
+                revalidation: Dict[str, int], depth: Optional[int] = None, ranking: str = "") -> SearchPage:
+    stale = fresh_until <= now
+    if stale:
+        revalidation["stale_served"] += 1
+    return SearchPage(entries, total, stale, depth, ranking)
+
+
+class CacheBackend(Protocol):
+    """
+    Writes are fire and forget: they are visible to reads at once and land in
+    the backing store when the backend gets to them, so a request never waits
+    on one. Reads answer None on a miss and on any failure of the backend
+    itself, which the service treats as a miss; a cache that is down costs
+    latency, never a request.
+    """
+
+    # Whether what is cached outlives the process, and so is worth warming.
+    persistent: bool
+    revalidation: Dict[str, int]
+
+    def cache_video_url(self, entry_id: str, source: str, video_url: Optional[str], ttl_seconds: int = 3600): ...
+
+    def invalidate_video_url(self, entry_id: str, source: str): ...
+
+    async def get_video_url(self, entry_id: str, source: str) -> Optional[str]:
+        """The cached URL, "" for a track cached as unavailable, or None on a miss."""
+        ...
+
+    def cache_search_results(
+        self,
+        query: str,
+        scored: list[tuple[float, dict]],
+        ttl_seconds: int = 1800,
+        scope: str = "",
+        depth: Optional[int] = None,
+        candidates: list[dict] = (),
+        ranking: str = "",
+    ):
+        """
+        Replace a query's ranked list. `depth` is how many results per source
+        it was built from, None when that was everything the sources had.
+        `candidates` are what it was ranked from, as CachedCandidates records,
+        kept so it can be ranked again under a version other than `ranking`
+        without asking the sources.
+        """
+        ...
+
+    async def get_search_page(self, query: str, offset: int, limit: int, scope: str = "") -> Optional[SearchPage]:
+        """
+        One page of a cached ranked list. Past its TTL the page is still
+        returned, marked stale, until the stale grace window closes. A page
+        past the end of a list fetched to a depth comes back short, and its
+        depth says there is more to fetch.
+        """
+        ...
+
+    async def get_search_candidates(self, query: str, scope: str = "") -> Optional[CachedCandidates]:
+        """What a cached list was ranked from, or None if it was stored without them."""
+        ...
+
+    def record_revalidation(self, refreshed: bool): ...
+
+    async def flush(self):
+        """Wait until every write made so far has reached the backing store."""
+        ...
+
+    async def sweep(self) -> Dict[str, Any]: ...
+
+    async def run_maintenance(self, interval_seconds: float): ...
+
+    async def warm_memory(self, limit: Optional[int] = None) -> int: ...
+
+    async def get_stats(self) -> Dict[str, Any]: ...
+
+    def cleanup(self): ...
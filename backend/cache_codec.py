@@ -0,0 +1,62 @@
+"""
+Storage format for cached entries.
+
+The cache keeps one row per entry, shared by every query that returned it, and
+a search row only lists which entries it ranked where. A page therefore reads
+and decodes only the entries on it, not the whole result set.
+
+Every entry is compact JSON, raw deflated against a shared dictionary of the
+keys and URL shapes every entry repeats, which is what lets a record a few
+hundred bytes long still compress.
+"""
+
+import json
+import zlib
+
+# Strings most records carry, most frequent last: deflate reaches the end of
+# the dictionary most cheaply. Changing this changes the format, so it has to
+# come with a new cache SCHEMA_VERSION.
+RECORD_DICTIONARY = (
+    " (Karaoke Version) Karaoke Instrumental Lyrics Sing King KaraFun Official "
+    '"video_url":null,'
+    '"duration":'
+    '"uploader":"'
+    '"artist":"'
+    '"title":"'
+    '"source":"youtube",'
+    '"thumbnail_url":"https://i.ytimg.com/vi/'
+    '/hqdefault.jpg"}'
+    '{"id":"'
+).encode()
+
+
+class RecordDecodeError(ValueError):
+    pass
+
+
+def encode_record(record: dict) -> bytes:
+    compressor = zlib.compressobj(level=9, wbits=-15, zdict=RECORD_DICTIONARY)
+    payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode()
+    return compressor.compress(payload) + compressor.flush()
+
+
+def decode_records(chunks: list[bytes]) -> list[dict]:
+    """
+    Inflate each record, then parse them as one JSON array: a json.loads call
+    costs more in overhead than a record takes to parse.
+    """
+    if not chunks:
+        return []
+
+    try:
+        payloads = []
+        for chunk in chunks:
+            decompressor = zlib.decompressobj(wbits=-15, zdict=RECORD_DICTIONARY)
+            payloads.append(decompressor.decompress(chunk) + decompressor.flush())
+        records = json.loads(b"[" + b",".join(payloads) + b"]")
+    except (zlib.error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise RecordDecodeError(f"Corrupt cached record: {e}") from e
+
+    if len(records) != len(chunks) or not all(isinstance(record, dict) for record in records):
+        raise RecordDecodeError("Cached record is not an object")
+    return records
@@ -0,0 +1,113 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from cache_backend import (
+    MISSING,
+    CachedCandidates,
+    CachedSearch,
+    MemoryTier,
+    SearchPage,
+    search_key,
+    search_page,
+)
+from config import config
+
+
+class MemoryCacheBackend:
+    """
+    A CacheBackend held entirely in process, in one bounded LRU.
+
+    Nothing touches disk and nothing survives the process, which is what a test
+    or a throwaway instance wants. Values are held as copies, so it behaves
+    like the stores that serialise them.
+    """
+
+    persistent = False
+
+    def __init__(
+        self,
+        max_entries: int = config.CACHE_MAX_ROWS,
+        search_stale_seconds: float = config.SEARCH_CACHE_STALE_SECONDS,
+    ):
+        self.memory = MemoryTier(max_entries)
+        self.search_stale_seconds = max(0.0, search_stale_seconds)
+        self.revalidation = {"stale_served": 0, "refreshed": 0, "refresh_failed": 0}
+        self.maintenance: Dict[str, Any] = {"sweeps": 0, "last_sweep_at": None, "expired_removed": 0}
+        print(f"[CACHE] Initialized in-memory cache ({self.memory.max_entries} entries)")
+
+    # Video URLs
+
+    def cache_video_url(self, entry_id: str, source: str, video_url: Optional[str], ttl_seconds: int = 3600):
+        self.memory.put(("video", source, entry_id), video_url, time.time() + ttl_seconds)
+
+    def invalidate_video_url(self, entry_id: str, source: str):
+        self.memory.discard(("video", source, entry_id))
+
+    async def get_video_url(self, entry_id: str, source: str) -> Optional[str]:
+        held = self.memory.get(("video", source, entry_id))
+        return None if held is MISSING else held
+
+    # Search results
+
+    def cache_search_results(
+        self,
+        query: str,
+        scored: list[tuple[float, dict]],
+        ttl_seconds: int = 1800,
+        scope: str = "",
+        depth: Optional[int] = None,
+        candidates: list[dict] = (),
+        ranking: str = "",
+    ):
+        expires_at = time.time() + ttl_seconds
+        held = CachedSearch.complete([entry for _, entry in scored], expires_at, depth, ranking)
+        held = held.with_candidates(candidates)
+        self.memory.put(search_key(query, scope), held, expires_at + self.search_stale_seconds)
+
+    async def get_search_page(self, query: str, offset: int, limit: int, scope: str = "") -> Optional[SearchPage]:
+        now = time.time()
+        held = self.memory.get(search_key(query, scope), now)
+        if held is MISSING:
+            return None
+        return search_page(
+            held.page(offset, limit), held.total, held.fresh_until, now, self.revalidation, held.depth, held.ranking
+        )
+
+    async def get_search_candidates(self, query: str, scope: str = "") -> Optional[CachedCandidates]:
+        held = self.memory.get(search_key(query, scope))
+        return None if held is MISSING else held.held_candidates()
+
+    def record_revalidation(self, refreshed: bool):
+        self.revalidation["refreshed" if refreshed else "refresh_failed"] += 1
+
+    # Maintenance
+
+    async def flush(self):
+        pass
+
+    async def sweep(self) -> Dict[str, Any]:
+        self.maintenance["sweeps"] += 1
+        self.maintenance["last_sweep_at"] = time.time()
+        self.maintenance["expired_removed"] += self.memory.purge_expired()
+        return dict(self.maintenance)
+
+    async def run_maintenance(self, interval_seconds: float = config.CACHE_SWEEP_INTERVAL_SECONDS):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.sweep()
+
+    async def warm_memory(self, limit: Optional[int] = None) -> int:
+        return 0
+
+    async def get_stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "memory": self.memory.stats(),
+            "maintenance": dict(self.maintenance),
+            "revalidation": dict(self.revalidation),
+            "persistent": self.persistent,
+        }
+
+    def cleanup(self):
+        self.memory.clear()
@@ -0,0 +1,505 @@
+"""
+A CacheBackend on a Redis server, shared by every worker and host pointed at it.
+
+Speaks RESP directly over asyncio streams rather than pulling in a client
+library for the handful of commands it needs. Anything that speaks the
+protocol will do: Redis, Valkey, KeyDB, or a stand-in in a test.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Dict, Hashable, Optional
+from urllib.parse import unquote, urlparse
+
+from cache_backend import MISSING, CachedCandidates, CachedSearch, SearchPage, search_key, search_page
+from cache_codec import RecordDecodeError, decode_records, encode_record
+from config import config
+
+CONNECT_TIMEOUT_SECONDS = 2.0
+
+# A cache read slower than this is slower than going without; the caller
+# treats it as a miss.
+COMMAND_TIMEOUT_SECONDS = 1.0
+
+# After a failed connect, reads and writes skip the cache this long rather than
+# each waiting out a connect timeout of its own.
+RECONNECT_BACKOFF_SECONDS = 5.0
+
+# Stores entries (KEYS, with their data in ARGV after the first) to expire no
+# sooner than ARGV[1] milliseconds from now, keeping a later expiry one already
+# has. A plain SET PX would replace it, and a list stored with a shorter TTL
+# would expire entries a longer lived list still ranks. A script rather than
+# PEXPIRE GT, which needs Redis 7.
+STORE_ENTRIES_SCRIPT = """
+local keep = tonumber(ARGV[1])
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, ARGV[i + 1], 'PX', math.max(redis.call('PTTL', key), keep))
+end
+return #KEYS
+"""
+
+
+class RedisError(Exception):
+    pass
+
+
+class ReplyError(RedisError):
+    """An error reply. Held as a value inside pipelines, raised for single commands."""
+
+
+class RedisClient:
+    """
+    One pipelined connection. Commands are written as they are issued and
+    replies matched back in order, so concurrent callers share the socket
+    without waiting on each other's round trips.
+    """
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported cache URL scheme {parsed.scheme!r}, expected redis:// or rediss://")
+
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.tls = parsed.scheme == "rediss"
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._replies: "deque[asyncio.Future]" = deque()
+        self._reply_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._retry_at = 0.0
+
+    @property
+    def address(self) -> str:
+        """Where the client points, without credentials, for logs and /health."""
+        return f"{'rediss' if self.tls else 'redis'}://{self.host}:{self.port}/{self.db}"
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def execute(self, *args) -> Any:
+        reply = (await self.pipeline([args]))[0]
+        if isinstance(reply, ReplyError):
+            raise reply
+        return reply
+
+    async def pipeline(self, commands: list[tuple]) -> list[Any]:
+        """Send every command in one write and wait for all their replies."""
+        await self._ensure_connected()
+        futures = self._send(commands)
+        try:
+            return await asyncio.wait_for(asyncio.gather(*futures), COMMAND_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # The replies may still come, and would then be matched to the
+            # wrong commands. Only a fresh connection is safe.
+            self._disconnect(RedisError("Command timed out"))
+            raise RedisError(f"No reply from {self.address} within {COMMAND_TIMEOUT_SECONDS}s")
+
+    def _send(self, commands: list[tuple]) -> list[asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in commands]
+        self._replies.extend(futures)
+        self._writer.write(b"".join(self._encode(command) for command in commands))
+        return futures
+
+    @staticmethod
+    def _encode(command: tuple) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            if isinstance(arg, bytes):
+                data = arg
+            elif isinstance(arg, str):
+                data = arg.encode()
+            else:
+                data = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _ensure_connected(self):
+        if self.connected:
+            return
+
+        async with self._connect_lock:
+            if self.connected:
+                return
+            if time.monotonic() < self._retry_at:
+                raise RedisError(f"{self.address} unreachable, retrying shortly")
+
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=self.tls or None),
+                    CONNECT_TIMEOUT_SECONDS,
+                )
+            except (OSError, asyncio.TimeoutError) as e:
+                self._retry_at = time.monotonic() + RECONNECT_BACKOFF_SECONDS
+                raise RedisError(f"Could not connect to {self.address}: {e or type(e).__name__}") from e
+
+            self._reply_task = asyncio.create_task(self._read_replies(self._reader))
+
+            handshake = []
+            if self.password is not None:
+                handshake.append(("AUTH", self.username, self.password) if self.username else ("AUTH", self.password))
+            if self.db:
+                handshake.append(("SELECT", self.db))
+            if handshake:
+                replies = await asyncio.wait_for(asyncio.gather(*self._send(handshake)), COMMAND_TIMEOUT_SECONDS)
+                for reply in replies:
+                    if isinstance(reply, ReplyError):
+                        self._disconnect(reply)
+                        raise reply
+
+            print(f"[CACHE] Connected to {self.address}")
+
+    async def _read_replies(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                reply = await self._read_reply(reader)
+                if self._replies:
+                    future = self._replies.popleft()
+                    if not future.done():
+                        future.set_result(reply)
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, RedisError) as e:
+            if self._reader is reader:
+                self._disconnect(RedisError(f"Connection to {self.address} lost: {e or type(e).__name__}"))
+
+    async def _read_reply(self, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readuntil(b"\r\n")
+        kind, body = line[:1], line[1:-2]
+
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            return ReplyError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [await self._read_reply(reader) for _ in range(length)]
+        raise RedisError(f"Unexpected reply {line[:40]!r}")
+
+    def _disconnect(self, error: Exception):
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+        if self._reply_task is not None and self._reply_task is not asyncio.current_task():
+            self._reply_task.cancel()
+        self._reply_task = None
+
+        replies, self._replies = self._replies, deque()
+        for future in replies:
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self):
+        self._disconnect(RedisError("Client closed"))
+
+
+class RedisCacheBackend:
+    """
+    Video URLs, ranked lists and entries each under their own keys, expired by
+    the server, so nothing here has to sweep.
+
+    Laid out like the SQLite store: a search key holds the list's length,
+    freshness and ranking version, a list key the entries it ranked in order,
+    a candidates key what it was ranked from, and each entry sits under its
+    own key, shared by every list that ranked it. A page reads its slice of
+    the list and then only its own entries.
+
+    Nothing is held in process. Workers sharing the server would otherwise keep
+    serving a URL another of them has invalidated.
+    """
+
+    persistent = True
+
+    def __init__(
+        self,
+        url: str = config.CACHE_REDIS_URL,
+        prefix: str = config.CACHE_REDIS_PREFIX,
+        search_stale_seconds: float = config.SEARCH_CACHE_STALE_SECONDS,
+    ):
+        self.client = RedisClient(url)
+        self.prefix = prefix
+        self.search_stale_seconds = max(0.0, search_stale_seconds)
+        self.revalidation = {"stale_served": 0, "refreshed": 0, "refresh_failed": 0}
+        self.counters = {"hits": 0, "misses": 0, "errors": 0, "last_error": None}
+
+        # Writes run as tasks. Until one lands its value is answered from here,
+        # so a read straight after a write sees it, as with the SQLite store.
+        self._pending: Dict[Hashable, tuple[asyncio.Task, Any]] = {}
+        self._writes: set[asyncio.Task] = set()
+
+        print(f"[CACHE] Using shared cache at {self.client.address} (prefix {prefix!r})")
+
+    def _video_key(self, entry_id: str, source: str) -> str:
+        return f"{self.prefix}url:{source}:{entry_id}"
+
+    def _entry_key(self, source: str, entry_id: str) -> str:
+        return f"{self.prefix}entry:{source}:{entry_id}"
+
+    def _error(self, action: str, error: Exception):
+        self.counters["errors"] += 1
+        self.counters["last_error"] = str(error)[:500]
+        print(f"[CACHE] Error {action}: {error}")
+
+    def _spawn(self, key: Hashable, value: Any, write, description: str):
+        async def run():
+            try:
+                for reply in await self.client.pipeline(write):
+                    # EXEC answers with the replies of the commands it ran.
+                    for result in reply if isinstance(reply, list) else [reply]:
+                        if isinstance(result, ReplyError):
+                            raise result
+            except RedisError as e:
+                self._error(description, e)
+            finally:
+                if key in self._pending and self._pending[key][0] is task:
+                    del self._pending[key]
+
+        task = asyncio.create_task(run())
+        self._pending[key] = (task, value)
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    def _pending_value(self, key: Hashable) -> Any:
+        pending = self._pending.get(key)
+        return MISSING if pending is None else pending[1]
+
+    # Video URLs
+
+    def cache_video_url(self, entry_id: str, source: str, video_url: Optional[str], ttl_seconds: int = 3600):
+        key = self._video_key(entry_id, source)
+        if ttl_seconds <= 0:
+            return
+        self._spawn(
+            key,
+            video_url or "",
+            [("SET", key, video_url or "", "PX", int(ttl_seconds * 1000))],
+            f"storing video URL for {entry_id}",
+        )
+
+    def invalidate_video_url(self, entry_id: str, source: str):
+        key = self._video_key(entry_id, source)
+        self._spawn(key, None, [("DEL", key)], f"dropping video URL for {entry_id}")
+        print(f"[CACHE] Dropped video URL for {entry_id}")
+
+    async def get_video_url(self, entry_id: str, source: str) -> Optional[str]:
+        key = self._video_key(entry_id, source)
+        pending = self._pending_value(key)
+        if pending is not MISSING:
+            return pending
+
+        try:
+            value = await self.client.execute("GET", key)
+        except RedisError as e:
+            self._error(f"retrieving video URL for {entry_id}", e)
+            return None
+
+        if value is None:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return value.decode()
+
+    # Search results
+
+    def cache_search_results(
+        self,
+        query: str,
+        scored: list[tuple[float, dict]],
+        ttl_seconds: int = 1800,
+        scope: str = "",
+        depth: Optional[int] = None,
+        candidates: list[dict] = (),
+        ranking: str = "",
+    ):
+        query_hash = search_key(query, scope)
+        fresh_until = time.time() + ttl_seconds
+        keep_ms = int((ttl_seconds + self.search_stale_seconds) * 1000)
+        if keep_ms <= 0:
+            return
+
+        try:
+            # Every ranked entry is a candidate too, and is encoded once.
+            encoded = {}
+            for entry in [record["entry"] for record in candidates] + [entry for _, entry in scored]:
+                key = self._entry_key(entry["source"], entry["id"])
+                if key not in encoded:
+                    encoded[key] = encode_record(entry)
+            ranked = [self._entry_key(entry["source"], entry["id"]) for _, entry in scored]
+            # The entry key rather than the entry, which is stored once however
+            # many lists hold it.
+            fetched = [
+                json.dumps(
+                    [record["tier"], self._entry_key(record["entry"]["source"], record["entry"]["id"]),
+                     record["signals"]],
+                    separators=(",", ":"),
+                )
+                for record in candidates
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"[CACHE] Error storing search results for '{query}': {e}")
+            return
+
+        results_key = f"{self.prefix}results:{query_hash}"
+        candidates_key = f"{self.prefix}candidates:{query_hash}"
+        write = [("MULTI",)]
+        # An entry's expiry is pushed out by every list that stores it, never
+        # pulled in, so it outlives the lists that rank it.
+        if encoded:
+            write.append(("EVAL", STORE_ENTRIES_SCRIPT, len(encoded), *encoded, keep_ms, *encoded.values()))
+        write += [("DEL", results_key), ("DEL", candidates_key)]
+        if ranked:
+            write.append(("RPUSH", results_key, *ranked))
+            write.append(("PEXPIRE", results_key, keep_ms))
+        if fetched:
+            write.append(("RPUSH", candidates_key, *fetched))
+            write.append(("PEXPIRE", candidates_key, keep_ms))
+        # Length and freshness, then the depth, "-" for a complete list, then
+        # the ranking version. Lists written before either existed end early,
+        # and read as complete and unversioned.
+        meta = f"{len(scored)} {fresh_until} {'-' if depth is None else depth} {ranking or '-'}"
+        write.append(("SET", f"{self.prefix}search:{query_hash}", meta, "PX", keep_ms))
+        write.append(("EXEC",))
+
+        # Carries the candidates, so a read before the write lands sees them.
+        held = CachedSearch.complete([entry for _, entry in scored], fresh_until, depth, ranking)
+        held = held.with_candidates(candidates)
+        self._spawn(query_hash, held, write, f"storing search results for '{query}'")
+        print(f"[CACHE] Stored search results for '{query}' (expires in {ttl_seconds}s)")
+
+    async def get_search_page(self, query: str, offset: int, limit: int, scope: str = "") -> Optional[SearchPage]:
+        query_hash = search_key(query, scope)
+        now = time.time()
+
+        held = self._pending_value(query_hash)
+        if held is not MISSING:
+            return search_page(
+                held.page(offset, limit), held.total, held.fresh_until, now, self.revalidation,
+                held.depth, held.ranking,
+            )
+
+        try:
+            meta, keys = await self.client.pipeline([
+                ("GET", f"{self.prefix}search:{query_hash}"),
+                ("LRANGE", f"{self.prefix}results:{query_hash}", offset, offset + limit - 1),
+            ])
+            if meta is None or isinstance(meta, ReplyError) or isinstance(keys, ReplyError):
+                self.counters["misses"] += 1
+                return None
+
+            total, fresh_until, depth, ranking = self._parse_meta(meta)
+            chunks = await self.client.execute("MGET", *keys) if keys else []
+
+        except (RedisError, ValueError) as e:
+            self._error(f"retrieving search results for '{query}'", e)
+            return None
+
+        # The list is only as long as the slice it asked for, and an entry that
+        # has gone leaves a hole; either way the page is incomplete.
+        if len(chunks) != max(0, min(limit, total - offset)) or any(chunk is None for chunk in chunks):
+            self.counters["misses"] += 1
+            return None
+
+        try:
+            records = decode_records(chunks)
+        except RecordDecodeError as e:
+            self._error(f"decoding search results for '{query}'", e)
+            return None
+
+        self.counters["hits"] += 1
+        return search_page(records, total, fresh_until, now, self.revalidation, depth, ranking)
+
+    async def get_search_candidates(self, query: str, scope: str = "") -> Optional[CachedCandidates]:
+        query_hash = search_key(query, scope)
+        held = self._pending_value(query_hash)
+        if held is not MISSING:
+            return held.held_candidates()
+
+        try:
+            meta, fetched = await self.client.pipeline([
+                ("GET", f"{self.prefix}search:{query_hash}"),
+                ("LRANGE", f"{self.prefix}candidates:{query_hash}", 0, -1),
+            ])
+            if meta is None or not fetched or isinstance(meta, ReplyError) or isinstance(fetched, ReplyError):
+                return None
+
+            _, fresh_until, depth, _ = self._parse_meta(meta)
+            fetched = [json.loads(item) for item in fetched]
+            chunks = await self.client.execute("MGET", *(key for _, key, _ in fetched))
+            if any(chunk is None for chunk in chunks):
+                return None
+            entries = decode_records(chunks)
+
+        except (RedisError, RecordDecodeError, ValueError) as e:
+            self._error(f"retrieving search candidates for '{query}'", e)
+            return None
+
+        records = [
+            {"tier": tier, "entry": entry, "signals": signals}
+            for (tier, _, signals), entry in zip(fetched, entries)
+        ]
+        return CachedCandidates(records, fresh_until, depth)
+
+    @staticmethod
+    def _parse_meta(meta: bytes) -> tuple[int, float, Optional[int], str]:
+        total, fresh_until, *rest = meta.decode().split()
+        depth = int(rest[0]) if rest and rest[0] != "-" else None
+        ranking = rest[1] if len(rest) > 1 and rest[1] != "-" else ""
+        return int(total), float(fresh_until), depth, ranking
+
+    def record_revalidation(self, refreshed: bool):
+        self.revalidation["refreshed" if refreshed else "refresh_failed"] += 1
+
+    # Maintenance
+
+    async def flush(self):
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+    async def sweep(self) -> Dict[str, Any]:
+        """The server expires every key itself; there is nothing to sweep."""
+        return {}
+
+    async def run_maintenance(self, interval_seconds: float = config.CACHE_SWEEP_INTERVAL_SECONDS):
+        pass
+
+    async def warm_memory(self, limit: Optional[int] = None) -> int:
+        # Every read goes to the server, which is already warm.
+        return 0
+
+    async def get_stats(self) -> Dict[str, Any]:
+        try:
+            keys = await self.client.execute("DBSIZE")
+        except RedisError as e:
+            self._error("getting stats", e)
+            keys = None
+
+        return {
+            "backend": "redis",
+            "address": self.client.address,
+            "connected": self.client.connected,
+            "keys": keys,
+            **self.counters,
+            "writes_queued": len(self._writes),
+            "revalidation": dict(self.revalidation),
+            "persistent": self.persistent,
+        }
+
+    def cleanup(self):
+        """Close the connection. Writes still queued are lost unless flush() ran first."""
+        self.client.close()
+        print(f"[CACHE] Closed shared cache connection to {self.client.address}")
@@ -1,30 +1,227 @@
-import sqlite3
-import hashlib
+import asyncio
 import json
+import sqlite3
+import queue
+import threading
 import time
-from typing import Optional, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, Hashable
 from pathlib import Path
 import tempfile
 import os
 
+from cache_backend import (
+    MISSING,
+    CacheBackend,
+    CachedCandidates,
+    CachedSearch,
+    MemoryTier,
+    SearchPage,
+    search_key,
+    search_page,
+)
+from cache_codec import RecordDecodeError, decode_records, encode_record
+from cache_memory import MemoryCacheBackend
+from cache_redis import RedisCacheBackend
+from config import config
+
+# How long the writer waits after the first queued write for others to share
+# its transaction, and the most one transaction will take.
+WRITE_BATCH_DELAY_SECONDS = 0.05
+WRITE_BATCH_MAX = 256
+
+# Rows one maintenance transaction may delete. Small enough that a write queued
+# behind it waits milliseconds, not the length of the whole sweep.
+SWEEP_BATCH_ROWS = 500
+
+# Free pages returned to the filesystem per sweep.
+VACUUM_PAGES_PER_SWEEP = 256
+
+# Bump whenever the tables change shape. A database at an older version is
+# upgraded through MIGRATIONS where a step is registered and discarded where
+# not: everything in it can be fetched again, so losing it costs only latency.
+SCHEMA_VERSION = 5
+
+
+def _add_search_depth(connection: sqlite3.Connection):
+    # Lists cached before depths existed were fetched in full, which NULL means.
+    connection.execute("ALTER TABLE search_cache ADD COLUMN depth INTEGER")
+
+
+def _add_search_ranking(connection: sqlite3.Connection):
+    # Lists cached before their candidates were have nothing to be ranked again
+    # from. They go, and the sweep collects the entries they referred to;
+    # search_candidates itself is created with the other tables.
+    connection.execute("ALTER TABLE search_cache ADD COLUMN ranking TEXT")
+    connection.execute("DELETE FROM search_cache")
+
+
+MIGRATIONS: Dict[int, Callable[[sqlite3.Connection], None]] = {
+    3: _add_search_depth,
+    4: _add_search_ranking,
+}
+
+
+class _Write:
+    """One queued change, applied by the writer thread inside a shared transaction."""
+
+    def __init__(self, apply: Callable[[sqlite3.Connection], Any], description: str,
+                 key: Optional[Hashable] = None, linger: bool = True):
+        self.apply = apply
+        self.description = description
+        self.key = key
+        # Whether the writer may hold this back to share a transaction. Off for
+        # writes something is waiting on, such as a sweep batch.
+        self.linger = linger
+        self.done: Future = Future()
+
+
 class CacheStore:
     """
-    Temporary SQLite-based cache for storing video URLs and search results.
-    Database is created in memory/temp and automatically cleaned up on server shutdown.
+    SQLite-based cache for storing video URLs and search results, and the
+    default CacheBackend.
+
+    With a cache_dir the database lives there and is reopened by the next
+    process, so a restart keeps every row that has not yet expired. Without one
+    it is created in a temp directory and deleted on server shutdown.
+    Recently used results are also held decoded in a MemoryTier, with SQLite
+    as the backing tier.
+
+    SQLite never runs on the event loop. Reads go to a reader thread with its
+    own connection, which WAL lets see the last commit without waiting on the
+    writer. Writes are queued and applied write-behind by a writer thread that
+    folds everything queued within WRITE_BATCH_DELAY_SECONDS into one
+    transaction, so a burst of prefetches pays for one commit instead of one
+    fsync each. Until a write commits, reads are answered from the queue.
     """
 
-    def __init__(self):
-        self.temp_dir = tempfile.mkdtemp(prefix="karaoke_cache_")
-        self.db_path = Path(self.temp_dir) / "cache.db"
-        self.connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+    def __init__(
+        self,
+        memory_max_entries: int = config.CACHE_MEMORY_MAX_ENTRIES,
+        max_rows: int = config.CACHE_MAX_ROWS,
+        cache_dir: str = config.CACHE_DIR,
+        search_stale_seconds: float = config.SEARCH_CACHE_STALE_SECONDS,
+    ):
+        self.memory = MemoryTier(memory_max_entries)
+        # How long past its TTL a search row is still served, flagged stale,
+        # while a refresh runs. The row is kept, and swept, on that deadline.
+        self.search_stale_seconds = max(0.0, search_stale_seconds)
+        self.revalidation = {"stale_served": 0, "refreshed": 0, "refresh_failed": 0}
+        self.persistent = bool(cache_dir)
+        if self.persistent:
+            self.temp_dir = None
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self.db_path = Path(cache_dir) / "cache.db"
+        else:
+            self.temp_dir = tempfile.mkdtemp(prefix="karaoke_cache_")
+            self.db_path = Path(self.temp_dir) / "cache.db"
+
+        # Owned by the writer thread once it starts.
+        self.connection = self._open_database()
+        self._init_tables()
+
+        # Written values not yet committed, keyed like the memory tier. Checked
+        # on every read so a write is visible the moment it is queued.
+        self._pending: Dict[Hashable, tuple[_Write, Any, float]] = {}
+        self._pending_lock = threading.Lock()
+        # Bumped on every queued write. A read that started before a write and
+        # finished after it may hold the old row, and must not be promoted.
+        self._write_seq = 0
+
+        self._writes: "queue.Queue[Optional[_Write]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="cache-writer", daemon=True)
+        self._writer.start()
+
+        self._reader_connection: Optional[sqlite3.Connection] = None
+        self._reader = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="cache-reader",
+            initializer=self._open_reader,
+        )
+
+        self.batches_committed = 0
+        self.writes_committed = 0
+
+        # Keys read since the last sweep. Recording recency on every hit would
+        # turn each read into a write, so it is applied in one batch per sweep.
+        self._touched: set[Hashable] = set()
+        self.max_rows = max_rows
+        self.maintenance: Dict[str, Any] = {
+            "sweeps": 0,
+            "last_sweep_at": None,
+            "last_sweep_seconds": None,
+            "last_expired_removed": 0,
+            "last_evicted": 0,
+            "last_collected": 0,
+            "expired_removed": 0,
+            "evicted": 0,
+            "collected": 0,
+            "last_error": None,
+        }
+        # Row counts for get_stats, and when they were taken. Each count scans
+        # a table on the reader thread, ahead of the cache reads queued there,
+        # so /health reuses them until the next sweep changes them.
+        self._counts: Optional[Dict[str, Any]] = None
+        self._counted_at = 0.0
+
+        kind = "persistent" if self.persistent else "temporary"
+        print(f"[CACHE] Initialized {kind} cache database at {self.db_path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+
+        # Only takes effect before the first table exists. Lets a sweep hand
+        # freed pages back a few at a time instead of through a full VACUUM.
+        connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
 
         # Enable WAL mode for better concurrent access
-        self.connection.execute("PRAGMA journal_mode=WAL")
-        self.connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
 
-        self._init_tables()
+    def _open_database(self) -> sqlite3.Connection:
+        """Open the database, bringing one left by an earlier process up to SCHEMA_VERSION."""
+        connection = None
+        try:
+            connection = self._connect()
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            tables = connection.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+            ).fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            print(f"[CACHE] Discarding unreadable cache database at {self.db_path}: {e}")
+            return self._recreate_database(connection)
+
+        if tables == 0 or version == SCHEMA_VERSION:
+            return connection
+
+        try:
+            while version in MIGRATIONS and version != SCHEMA_VERSION:
+                MIGRATIONS[version](connection)
+                version += 1
+                connection.execute(f"PRAGMA user_version = {version}")
+                connection.commit()
+        except sqlite3.Error as e:
+            print(f"[CACHE] Migrating cache database from version {version} failed: {e}")
+
+        if version == SCHEMA_VERSION:
+            print(f"[CACHE] Migrated cache database to version {SCHEMA_VERSION}")
+            return connection
+
+        print(f"[CACHE] Discarding cache database at version {version}, expected {SCHEMA_VERSION}")
+        return self._recreate_database(connection)
 
-        print(f"[CACHE] Initialized temporary cache database at {self.db_path}")
+    def _recreate_database(self, connection: Optional[sqlite3.Connection]) -> sqlite3.Connection:
+        if connection is not None:
+            connection.close()
+        self._delete_database_files()
+        return self._connect()
+
+    def _delete_database_files(self):
+        for suffix in ("", "-wal", "-shm"):
+            path = self.db_path.with_name(self.db_path.name + suffix)
+            if path.exists():
+                path.unlink()
 
     def _init_tables(self):
         self.connection.executescript("""
@@ -37,185 +234,741 @@ class CacheStore:
                 video_url TEXT,
                 created_at REAL NOT NULL,
                 expires_at REAL,
+                accessed_at REAL NOT NULL,
                 PRIMARY KEY (entry_id, source)
             );
 
-            -- Search results cache
+            -- Search results cache. One row per query; what it ranked is in
+            -- search_results, and the entries themselves in entries.
             CREATE TABLE IF NOT EXISTS search_cache (
                 query_hash TEXT PRIMARY KEY,
                 query TEXT NOT NULL,
-                results TEXT NOT NULL, -- JSON serialized results
+                total INTEGER NOT NULL,
                 created_at REAL NOT NULL,
-                expires_at REAL
+                expires_at REAL,
+                accessed_at REAL NOT NULL,
+                depth INTEGER, -- Results per source it was built from; NULL when all of them
+                ranking TEXT -- The ranking version search_results was ordered under
+            );
+
+            -- A query's ranked list, one row per position. Slicing by
+            -- position is what lets a page read only its own entries.
+            CREATE TABLE IF NOT EXISTS search_results (
+                query_hash TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                entry_id TEXT NOT NULL,
+                score REAL,
+                PRIMARY KEY (query_hash, position)
+            );
+
+            -- Everything the sources returned for a query, ranked or not, in
+            -- the order it was fetched, with the signals it was ranked by.
+            -- Lets the list be ranked again without asking the sources.
+            CREATE TABLE IF NOT EXISTS search_candidates (
+                query_hash TEXT NOT NULL,
+                ordinal INTEGER NOT NULL,
+                tier INTEGER NOT NULL, -- The fetch that added it, 0 for the first
+                source TEXT NOT NULL,
+                entry_id TEXT NOT NULL,
+                signals TEXT NOT NULL, -- RankingSignals as JSON
+                PRIMARY KEY (query_hash, ordinal)
+            );
+
+            -- One row per entry, however many queries returned it. Rows no
+            -- search refers to any more are collected by the sweep.
+            CREATE TABLE IF NOT EXISTS entries (
+                source TEXT NOT NULL,
+                entry_id TEXT NOT NULL,
+                data BLOB NOT NULL, -- Encoded by cache_codec
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (source, entry_id)
             );
 
             -- Create indexes for performance
             CREATE INDEX IF NOT EXISTS idx_video_url_source ON video_url_cache(source);
             CREATE INDEX IF NOT EXISTS idx_video_url_expires ON video_url_cache(expires_at);
             CREATE INDEX IF NOT EXISTS idx_search_expires ON search_cache(expires_at);
+            CREATE INDEX IF NOT EXISTS idx_video_url_accessed ON video_url_cache(accessed_at);
+            CREATE INDEX IF NOT EXISTS idx_search_accessed ON search_cache(accessed_at);
+            CREATE INDEX IF NOT EXISTS idx_search_results_entry ON search_results(source, entry_id);
+            CREATE INDEX IF NOT EXISTS idx_search_candidates_entry ON search_candidates(source, entry_id);
         """)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         self.connection.commit()
 
+    # Threads
+
+    def _open_reader(self):
+        self._reader_connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+
+    async def _read(self, fn: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._reader, fn, *args)
+
+    def _enqueue(self, write: _Write, value: Any = MISSING, expires_at: float = 0.0) -> _Write:
+        if write.key is not None:
+            with self._pending_lock:
+                self._pending[write.key] = (write, value, expires_at)
+        self._write_seq += 1
+        self._writes.put(write)
+        return write
+
+    def _pending_value(self, key: Hashable, now: float) -> Any:
+        """A queued value, None for a queued delete, or MISSING when nothing is queued."""
+        with self._pending_lock:
+            pending = self._pending.get(key)
+        if pending is None:
+            return MISSING
+
+        _, value, expires_at = pending
+        if value is MISSING or expires_at <= now:
+            return None
+        return value
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            first = self._writes.get()
+            if first is None:
+                break
+
+            batch = [first]
+            deadline = time.monotonic() + (WRITE_BATCH_DELAY_SECONDS if first.linger else 0)
+            while len(batch) < WRITE_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                try:
+                    write = self._writes.get(timeout=remaining) if remaining > 0 else self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if write is None:
+                    stopping = True
+                    break
+                batch.append(write)
+
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch: list[_Write]):
+        results: list[tuple[_Write, Any, Optional[BaseException]]] = []
+        for write in batch:
+            # Any exception, not only sqlite3's: the thread dying would leave
+            # every write queued after it waiting for good.
+            try:
+                results.append((write, write.apply(self.connection), None))
+            except Exception as e:
+                print(f"[CACHE] Error {write.description}: {e}")
+                results.append((write, None, e))
+
+        try:
+            self.connection.commit()
+            self.batches_committed += 1
+            self.writes_committed += len(batch)
+        except sqlite3.Error as e:
+            print(f"[CACHE] Error committing {len(batch)} cache writes: {e}")
+            results = [(write, None, error or e) for write, _, error in results]
+
+        with self._pending_lock:
+            for write, _, _ in results:
+                # A newer write to the same key stays pending until it lands too.
+                pending = self._pending.get(write.key)
+                if pending is not None and pending[0] is write:
+                    del self._pending[write.key]
+
+        for write, result, error in results:
+            # A waiter that gave up cancels the future, not the write.
+            if write.done.done():
+                continue
+            if error is None:
+                write.done.set_result(result)
+            else:
+                write.done.set_exception(error)
+
+    async def flush(self):
+        """Wait until everything queued so far has been committed."""
+        barrier = self._enqueue(_Write(lambda connection: None, "flushing", linger=False))
+        await asyncio.wrap_future(barrier.done)
+
+    # Video URLs
+
     def cache_video_url(self, entry_id: str, source: str, video_url: Optional[str], ttl_seconds: int = 3600):
         now = time.time()
         expires_at = now + ttl_seconds
+        key = self._video_key(entry_id, source)
 
-        try:
-            self.connection.execute("""
+        def apply(connection: sqlite3.Connection):
+            connection.execute("""
                 INSERT OR REPLACE INTO video_url_cache
-                (entry_id, source, video_url, created_at, expires_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (entry_id, source, video_url, now, expires_at))
-            self.connection.commit()
+                (entry_id, source, video_url, created_at, expires_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (entry_id, source, video_url, now, expires_at, now))
 
-            cache_status = "HIT" if video_url else "MISS"
-            print(f"[CACHE] Stored video URL {cache_status} for {entry_id} (expires in {ttl_seconds}s)")
+        self._enqueue(_Write(apply, f"storing video URL for {entry_id}", key), video_url, expires_at)
+        self.memory.put(key, video_url, expires_at)
 
-        except sqlite3.Error as e:
-            print(f"[CACHE] Error storing video URL for {entry_id}: {e}")
+        cache_status = "HIT" if video_url else "MISS"
+        print(f"[CACHE] Stored video URL {cache_status} for {entry_id} (expires in {ttl_seconds}s)")
 
     def invalidate_video_url(self, entry_id: str, source: str):
         """Drop a cached URL that turned out not to play."""
-        try:
-            self.connection.execute("""
+        key = self._video_key(entry_id, source)
+
+        def apply(connection: sqlite3.Connection):
+            connection.execute("""
                 DELETE FROM video_url_cache WHERE entry_id = ? AND source = ?
             """, (entry_id, source))
-            self.connection.commit()
-            print(f"[CACHE] Dropped video URL for {entry_id}")
 
-        except sqlite3.Error as e:
-            print(f"[CACHE] Error dropping video URL for {entry_id}: {e}")
+        # Queued before the memory copy is dropped, so no read in between can
+        # fall through to the row that is about to go.
+        self._enqueue(_Write(apply, f"dropping video URL for {entry_id}", key))
+        self.memory.discard(key)
+        print(f"[CACHE] Dropped video URL for {entry_id}")
 
-    def get_video_url(self, entry_id: str, source: str) -> Optional[str]:
+    async def get_video_url(self, entry_id: str, source: str) -> Optional[str]:
         now = time.time()
+        key = self._video_key(entry_id, source)
+
+        held = self.memory.get(key, now)
+        if held is not MISSING:
+            self._touched.add(key)
+            return held
+
+        pending = self._pending_value(key, now)
+        if pending is not MISSING:
+            return pending
+
+        seq = self._write_seq
+        row = await self._read(self._read_video_url, entry_id, source, now)
+        if row is None:
+            print(f"[CACHE] Video URL cache MISS for {entry_id}")
+            return None
+
+        video_url, created_at, expires_at = row
+        age_seconds = int(now - created_at)
+        expires_in = int(expires_at - now)
+        print(f"[CACHE] Video URL cache HIT for {entry_id} (age: {age_seconds}s, expires in: {expires_in}s)")
+        self._touched.add(key)
+
+        if seq == self._write_seq:
+            self.memory.put(key, video_url, expires_at)
+        return video_url
 
+    def _read_video_url(self, entry_id: str, source: str, now: float) -> Optional[tuple]:
         try:
-            cursor = self.connection.execute("""
+            cursor = self._reader_connection.execute("""
                 SELECT video_url, created_at, expires_at
                 FROM video_url_cache
                 WHERE entry_id = ? AND source = ? AND expires_at > ?
             """, (entry_id, source, now))
-
-            row = cursor.fetchone()
-            if row:
-                video_url, created_at, expires_at = row
-                age_seconds = int(now - created_at)
-                expires_in = int(expires_at - now)
-
-                print(f"[CACHE] Video URL cache HIT for {entry_id} (age: {age_seconds}s, expires in: {expires_in}s)")
-                return video_url
-
-            print(f"[CACHE] Video URL cache MISS for {entry_id}")
-            return None
+            return cursor.fetchone()
 
         except sqlite3.Error as e:
             print(f"[CACHE] Error retrieving video URL for {entry_id}: {e}")
             return None
 
-    def cache_search_results(self, query: str, results: Dict[str, Any], ttl_seconds: int = 1800, scope: str = ""):
+    # Search results
+
+    def cache_search_results(
+        self,
+        query: str,
+        scored: list[tuple[float, dict]],
+        ttl_seconds: int = 1800,
+        scope: str = "",
+        depth: Optional[int] = None,
+        candidates: list[dict] = (),
+        ranking: str = "",
+    ):
         """
         Cache search results
 
         Args:
             query: Search query string
-            results: Search results to cache
+            scored: Every ranked match as (score, entry dict), in rank order
             ttl_seconds: Time to live in seconds (default 30 minutes)
             scope: Identifies what produced the results, so a page built by a
                 different set of sources is a different cache entry
+            depth: Results per source the list was built from, or None when
+                the sources were asked for everything
+            candidates: What the list was ranked from, as CachedCandidates
+                records, so it can be ranked again without the sources
+            ranking: The ranking version the list was ordered under
         """
         query_hash = self._query_hash(query, scope)
         now = time.time()
         expires_at = now + ttl_seconds
 
         try:
-            results_json = json.dumps(results)
+            # Every ranked entry is a candidate too, and is encoded once.
+            encoded = {}
+            for entry in [record["entry"] for record in candidates] + [entry for _, entry in scored]:
+                key = (entry["source"], entry["id"])
+                if key not in encoded:
+                    encoded[key] = encode_record(entry)
+            candidate_rows = [
+                (query_hash, ordinal, record["tier"], record["entry"]["source"], record["entry"]["id"],
+                 json.dumps(record["signals"], separators=(",", ":")))
+                for ordinal, record in enumerate(candidates)
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"[CACHE] Error storing search results for '{query}': {e}")
+            return
 
-            self.connection.execute("""
-                INSERT OR REPLACE INTO search_cache
-                (query_hash, query, results, created_at, expires_at)
+        entry_rows = [(source, entry_id, data, now) for (source, entry_id), data in encoded.items()]
+        result_rows = [
+            (query_hash, position, entry["source"], entry["id"], score)
+            for position, (score, entry) in enumerate(scored)
+        ]
+
+        def apply(connection: sqlite3.Connection):
+            # An entry another query already stored is rewritten only if it
+            # changed, so overlapping queries do not write it again.
+            connection.executemany("""
+                INSERT INTO entries (source, entry_id, data, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (source, entry_id) DO UPDATE
+                SET data = excluded.data, updated_at = excluded.updated_at
+                WHERE data != excluded.data
+            """, entry_rows)
+            connection.execute("DELETE FROM search_results WHERE query_hash = ?", (query_hash,))
+            connection.executemany("""
+                INSERT INTO search_results (query_hash, position, source, entry_id, score)
                 VALUES (?, ?, ?, ?, ?)
-            """, (query_hash, query, results_json, now, expires_at))
-            self.connection.commit()
+            """, result_rows)
+            connection.execute("DELETE FROM search_candidates WHERE query_hash = ?", (query_hash,))
+            connection.executemany("""
+                INSERT INTO search_candidates (query_hash, ordinal, tier, source, entry_id, signals)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, candidate_rows)
+            connection.execute("""
+                INSERT OR REPLACE INTO search_cache
+                (query_hash, query, total, created_at, expires_at, accessed_at, depth, ranking)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (query_hash, query, len(scored), now, expires_at, now, depth, ranking))
 
-            print(f"[CACHE] Stored search results for '{query}' (expires in {ttl_seconds}s)")
+        # Held as copies, so a later hit cannot see a caller's own later
+        # changes to the dicts it passed in. The memory tier leaves the
+        # candidates to SQLite, as a list is rarely ranked again; the queued
+        # write carries them until they are there to be read.
+        held = CachedSearch.complete([entry for _, entry in scored], expires_at, depth, ranking)
+        stale_until = expires_at + self.search_stale_seconds
+        self._enqueue(
+            _Write(apply, f"storing search results for '{query}'", query_hash),
+            held.with_candidates(candidates),
+            stale_until,
+        )
+        self.memory.put(query_hash, held, stale_until)
 
-        except sqlite3.Error as e:
-            print(f"[CACHE] Error storing search results for '{query}': {e}")
+        print(f"[CACHE] Stored search results for '{query}' (expires in {ttl_seconds}s)")
+
+    async def get_search_page(self, query: str, offset: int, limit: int, scope: str = "") -> Optional[SearchPage]:
+        """
+        One page of a query's cached ranked list, with the length of the whole
+        list. A list past its TTL is still returned, marked stale, until the
+        grace window closes; the caller decides whether to refresh it.
+        """
+        query_hash = self._query_hash(query, scope)
+        now = time.time()
+
+        held = self.memory.get(query_hash, now)
+        if held is MISSING:
+            held = self._pending_value(query_hash, now)
+        if held is not MISSING and held is not None:
+            page = held.page(offset, limit)
+            if page is not None:
+                self._touched.add(query_hash)
+                return search_page(
+                    page, held.total, held.fresh_until, now, self.revalidation, held.depth, held.ranking
+                )
+
+        seq = self._write_seq
+        row = await self._read(
+            self._read_search_page, query, query_hash, now - self.search_stale_seconds, offset, limit
+        )
+        if row is None:
+            print(f"[CACHE] Search cache MISS for '{query}'")
+            return None
+
+        total, records, created_at, expires_at, depth, ranking = row
+        age_seconds = int(now - created_at)
+        expires_in = int(expires_at - now)
+        print(f"[CACHE] Search cache HIT for '{query}' (age: {age_seconds}s, expires in: {expires_in}s)")
+        self._touched.add(query_hash)
+
+        if seq == self._write_seq:
+            if (not isinstance(held, CachedSearch) or held.total != total
+                    or held.depth != depth or held.ranking != ranking):
+                held = CachedSearch(total, expires_at, depth, ranking)
+            held.fill(offset, records)
+            self.memory.put(query_hash, held, expires_at + self.search_stale_seconds)
 
-    def get_search_results(self, query: str, scope: str = "") -> Optional[Dict[str, Any]]:
+        return search_page(
+            [dict(record) for record in records], total, expires_at, now, self.revalidation, depth, ranking
+        )
+
+    async def get_search_candidates(self, query: str, scope: str = "") -> Optional[CachedCandidates]:
         query_hash = self._query_hash(query, scope)
         now = time.time()
 
+        # A write still queued replaces whatever SQLite holds for the query.
+        held = self._pending_value(query_hash, now)
+        if held is not MISSING:
+            return None if held is None else held.held_candidates()
+
+        return await self._read(self._read_search_candidates, query, query_hash, now - self.search_stale_seconds)
+
+    def record_revalidation(self, refreshed: bool):
+        """Count how a refresh started for a stale page ended."""
+        self.revalidation["refreshed" if refreshed else "refresh_failed"] += 1
+
+    def _read_search_page(
+        self, query: str, query_hash: str, stale_cutoff: float, offset: int, limit: int
+    ) -> Optional[tuple]:
         try:
-            cursor = self.connection.execute("""
-                SELECT results, created_at, expires_at
+            row = self._reader_connection.execute("""
+                SELECT total, created_at, expires_at, depth, ranking
                 FROM search_cache
                 WHERE query_hash = ? AND expires_at > ?
-            """, (query_hash, now))
+            """, (query_hash, stale_cutoff)).fetchone()
+            if row is None:
+                return None
+
+            total, created_at, expires_at, depth, ranking = row
+            records = self._read_positions(query_hash, offset, min(offset + limit, total))
+            if records is None:
+                return None
+            return total, records, created_at, expires_at, depth, ranking or ""
+
+        except (sqlite3.Error, RecordDecodeError) as e:
+            print(f"[CACHE] Error retrieving search results for '{query}': {e}")
+            return None
 
-            row = cursor.fetchone()
-            if row:
-                results_json, created_at, expires_at = row
-                age_seconds = int(now - created_at)
-                expires_in = int(expires_at - now)
+    def _read_search_candidates(self, query: str, query_hash: str, stale_cutoff: float) -> Optional[CachedCandidates]:
+        try:
+            row = self._reader_connection.execute("""
+                SELECT expires_at, depth
+                FROM search_cache
+                WHERE query_hash = ? AND expires_at > ?
+            """, (query_hash, stale_cutoff)).fetchone()
+            if row is None:
+                return None
 
-                print(f"[CACHE] Search cache HIT for '{query}' (age: {age_seconds}s, expires in: {expires_in}s)")
-                return json.loads(results_json)
+            rows = self._reader_connection.execute("""
+                SELECT search_candidates.tier, search_candidates.signals, entries.data
+                FROM search_candidates
+                JOIN entries USING (source, entry_id)
+                WHERE search_candidates.query_hash = ?
+                ORDER BY search_candidates.ordinal
+            """, (query_hash,)).fetchall()
+            if not rows:
+                return None
 
-            print(f"[CACHE] Search cache MISS for '{query}'")
+            entries = decode_records([data for _, _, data in rows])
+            records = [
+                {"tier": tier, "entry": entry, "signals": json.loads(signals)}
+                for (tier, signals, _), entry in zip(rows, entries)
+            ]
+            expires_at, depth = row
+            return CachedCandidates(records, expires_at, depth)
+
+        except (sqlite3.Error, RecordDecodeError, ValueError) as e:
+            print(f"[CACHE] Error retrieving search candidates for '{query}': {e}")
             return None
 
-        except (sqlite3.Error, json.JSONDecodeError) as e:
-            print(f"[CACHE] Error retrieving search results for '{query}': {e}")
+    def _read_positions(self, query_hash: str, start: int, stop: int) -> Optional[list[dict]]:
+        """Entries ranked from start up to stop, or None if any has gone missing."""
+        if stop <= start:
+            return []
+
+        chunks = [data for (data,) in self._reader_connection.execute("""
+            SELECT entries.data
+            FROM search_results
+            JOIN entries USING (source, entry_id)
+            WHERE search_results.query_hash = ?
+              AND search_results.position >= ? AND search_results.position < ?
+            ORDER BY search_results.position
+        """, (query_hash, start, stop))]
+
+        # A row swept between statements leaves a hole; read it as a miss.
+        if len(chunks) != stop - start:
             return None
+        return decode_records(chunks)
 
     @staticmethod
     def _query_hash(query: str, scope: str) -> str:
-        return hashlib.sha256(f"{scope}|{query.lower()}".encode()).hexdigest()
+        return search_key(query, scope)
 
-    def cleanup_expired(self):
-        now = time.time()
+    @staticmethod
+    def _video_key(entry_id: str, source: str) -> tuple[str, str, str]:
+        # Tuples never collide with the hex strings search results are held under.
+        return ("video", source, entry_id)
+
+    # Warm start
+
+    async def warm_memory(self, limit: Optional[int] = None) -> int:
+        """
+        Load the most recently read rows a previous process left behind into
+        the memory tier, so the songs and queries of the last party come back
+        without a database read. Returns how many were loaded.
+        """
+        limit = self.memory.max_entries if limit is None else min(limit, self.memory.max_entries)
+        if limit <= 0:
+            return 0
+
+        videos, searches = await self._read(self._read_warm_rows, time.time(), limit)
+
+        # Least recent first, so the most recent end up at the fresh end of the LRU.
+        for entry_id, source, video_url, expires_at in reversed(videos):
+            self.memory.put(self._video_key(entry_id, source), video_url, expires_at)
+        for query_hash, records, expires_at, depth, ranking in reversed(searches):
+            self.memory.put(
+                query_hash,
+                CachedSearch.complete(records, expires_at, depth, ranking),
+                expires_at + self.search_stale_seconds,
+            )
 
+        return len(videos) + len(searches)
+
+    def _read_warm_rows(self, now: float, limit: int) -> tuple[list, list]:
         try:
-            # Clean up expired video URLs
-            cursor = self.connection.execute("""
-                DELETE FROM video_url_cache WHERE expires_at <= ?
-            """, (now,))
-            video_deleted = cursor.rowcount
+            videos = self._reader_connection.execute("""
+                SELECT entry_id, source, video_url, expires_at
+                FROM video_url_cache
+                WHERE expires_at > ?
+                ORDER BY accessed_at DESC
+                LIMIT ?
+            """, (now, limit // 2)).fetchall()
 
-            # Clean up expired search results
-            cursor = self.connection.execute("""
-                DELETE FROM search_cache WHERE expires_at <= ?
-            """, (now,))
-            search_deleted = cursor.rowcount
+            searches = []
+            for query_hash, total, expires_at, depth, ranking in self._reader_connection.execute("""
+                SELECT query_hash, total, expires_at, depth, ranking
+                FROM search_cache
+                WHERE expires_at > ?
+                ORDER BY accessed_at DESC
+                LIMIT ?
+            """, (now - self.search_stale_seconds, limit - len(videos))).fetchall():
+                try:
+                    records = self._read_positions(query_hash, 0, total)
+                except RecordDecodeError:
+                    continue
+                if records is not None:
+                    searches.append((query_hash, records, expires_at, depth, ranking or ""))
 
-            self.connection.commit()
+            return videos, searches
+
+        except sqlite3.Error as e:
+            print(f"[CACHE] Error warming the memory tier: {e}")
+            return [], []
+
+    # Maintenance
+
+    async def _write(self, apply: Callable[[sqlite3.Connection], Any], description: str) -> Any:
+        return await asyncio.wrap_future(self._enqueue(_Write(apply, description, linger=False)).done)
 
-            if video_deleted > 0 or search_deleted > 0:
-                print(f"[CACHE] Cleaned up {video_deleted} expired video URLs and {search_deleted} expired search results")
+    async def _delete_batched(
+        self, table: str, where: str, order: str, params: tuple, limit: Optional[int] = None
+    ) -> int:
+        """
+        Delete matching rows, up to `limit` if given, SWEEP_BATCH_ROWS per
+        transaction, so writes queued behind the sweep get a turn between batches.
+        """
+        removed = 0
+        while limit is None or removed < limit:
+            batch = SWEEP_BATCH_ROWS if limit is None else min(SWEEP_BATCH_ROWS, limit - removed)
+
+            def apply(connection: sqlite3.Connection) -> int:
+                return connection.execute(f"""
+                    DELETE FROM {table} WHERE rowid IN (
+                        SELECT rowid FROM {table} WHERE {where} ORDER BY {order} LIMIT ?
+                    )
+                """, (*params, batch)).rowcount
+
+            deleted = await self._write(apply, f"sweeping {table}")
+            removed += deleted
+            if deleted < batch:
+                break
+
+        return removed
+
+    async def _apply_touches(self):
+        touched, self._touched = self._touched, set()
+        if not touched:
+            return
+
+        now = time.time()
+        videos = [(now, key[2], key[1]) for key in touched if isinstance(key, tuple)]
+        searches = [(now, key) for key in touched if isinstance(key, str)]
+
+        def apply(connection: sqlite3.Connection):
+            connection.executemany("""
+                UPDATE video_url_cache SET accessed_at = ? WHERE entry_id = ? AND source = ?
+            """, videos)
+            connection.executemany("""
+                UPDATE search_cache SET accessed_at = ? WHERE query_hash = ?
+            """, searches)
+
+        await self._write(apply, "recording cache reads")
+
+    async def cleanup_expired(self) -> int:
+        now = time.time()
+
+        # Clean up expired video URLs
+        video_deleted = await self._delete_batched(
+            "video_url_cache", "expires_at <= ?", "expires_at", (now,)
+        )
+
+        # Clean up expired search results, once even a stale copy is too old
+        search_deleted = await self._delete_batched(
+            "search_cache", "expires_at <= ?", "expires_at", (now - self.search_stale_seconds,)
+        )
+
+        if video_deleted > 0 or search_deleted > 0:
+            print(f"[CACHE] Cleaned up {video_deleted} expired video URLs and {search_deleted} expired search results")
+
+        return video_deleted + search_deleted
+
+    async def _enforce_max_rows(self) -> int:
+        """Evict the least recently read rows of any table over max_rows."""
+        if self.max_rows <= 0:
+            return 0
+
+        evicted = 0
+        for table in ("video_url_cache", "search_cache"):
+            def count(connection: sqlite3.Connection, table=table) -> int:
+                return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+            excess = await self._write(count, f"counting {table}") - self.max_rows
+            if excess > 0:
+                evicted += await self._delete_batched(table, "1", "accessed_at", (), excess)
+
+        if evicted:
+            print(f"[CACHE] Evicted {evicted} least recently used rows over the {self.max_rows} row cap")
+        return evicted
+
+    async def _collect_orphans(self) -> int:
+        """
+        Drop ranked lists and candidates whose search row has gone, then
+        entries neither refers to any more. An entry shared by several queries
+        stays until the last of them expires.
+        """
+        lists = 0
+        for table in ("search_results", "search_candidates"):
+            lists += await self._delete_batched(
+                table,
+                f"NOT EXISTS (SELECT 1 FROM search_cache WHERE search_cache.query_hash = {table}.query_hash)",
+                "rowid",
+                (),
+            )
+        entries = await self._delete_batched(
+            "entries",
+            """NOT EXISTS (
+                SELECT 1 FROM search_results
+                WHERE search_results.source = entries.source AND search_results.entry_id = entries.entry_id
+            ) AND NOT EXISTS (
+                SELECT 1 FROM search_candidates
+                WHERE search_candidates.source = entries.source AND search_candidates.entry_id = entries.entry_id
+            )""",
+            "rowid",
+            (),
+        )
+
+        if entries:
+            print(f"[CACHE] Collected {entries} entries no cached search refers to")
+        return lists + entries
+
+    async def sweep(self) -> Dict[str, Any]:
+        """
+        One maintenance pass: record recent reads, drop expired rows, evict
+        down to max_rows, collect entries nothing refers to and return freed
+        pages to the filesystem. Every step runs on the writer thread in
+        bounded batches.
+        """
+        started = time.monotonic()
+        expired = evicted = collected = 0
+
+        try:
+            await self._apply_touches()
+            expired = await self.cleanup_expired()
+            evicted = await self._enforce_max_rows()
+            collected = await self._collect_orphans()
+            await self._write(
+                lambda connection: connection.execute(
+                    f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_SWEEP})"
+                ).fetchall(),
+                "vacuuming",
+            )
+            self.maintenance["last_error"] = None
 
         except sqlite3.Error as e:
-            print(f"[CACHE] Error during cleanup: {e}")
+            self.maintenance["last_error"] = str(e)[:500]
 
-    def get_stats(self) -> Dict[str, Any]:
+        self.maintenance["sweeps"] += 1
+        self.maintenance["last_sweep_at"] = time.time()
+        self.maintenance["last_sweep_seconds"] = round(time.monotonic() - started, 4)
+        self.maintenance["last_expired_removed"] = expired
+        self.maintenance["last_evicted"] = evicted
+        self.maintenance["last_collected"] = collected
+        self.maintenance["expired_removed"] += expired
+        self.maintenance["evicted"] += evicted
+        self.maintenance["collected"] += collected
+        # Taken again on the next get_stats.
+        self._counts = None
+        return dict(self.maintenance)
+
+    async def run_maintenance(self, interval_seconds: float = config.CACHE_SWEEP_INTERVAL_SECONDS):
+        """Sweep forever. Started as a task by the FastAPI lifespan, which cancels it."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[CACHE] Maintenance sweep failed: {e}")
+
+    async def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        if self._counts is None or now - self._counted_at >= config.CACHE_SWEEP_INTERVAL_SECONDS:
+            stats = await self._read(self._read_stats, now)
+            if "error" in stats:
+                return stats
+            self._counts, self._counted_at = stats, now
+
+        return {
+            **self._counts,
+            "counted_at": self._counted_at,
+            "memory": self.memory.stats(),
+            "writes": {
+                "queued": self._writes.qsize(),
+                "batches_committed": self.batches_committed,
+                "writes_committed": self.writes_committed,
+            },
+            "maintenance": dict(self.maintenance),
+            "revalidation": dict(self.revalidation),
+            "backend": "sqlite",
+            "persistent": self.persistent,
+            "db_path": str(self.db_path)
+        }
+
+    def _read_stats(self, now: float) -> Dict[str, Any]:
         try:
             # Video URL cache stats
-            video_cursor = self.connection.execute("""
+            video_cursor = self._reader_connection.execute("""
                 SELECT
                     COUNT(*) as total,
                     COUNT(CASE WHEN video_url IS NOT NULL THEN 1 END) as hits,
                     COUNT(CASE WHEN video_url IS NULL THEN 1 END) as misses
                 FROM video_url_cache
                 WHERE expires_at > ?
-            """, (time.time(),))
+            """, (now,))
             video_stats = video_cursor.fetchone()
 
             # Search cache stats
-            search_cursor = self.connection.execute("""
+            search_cursor = self._reader_connection.execute("""
                 SELECT COUNT(*) FROM search_cache WHERE expires_at > ?
-            """, (time.time(),))
+            """, (now,))
             search_count = search_cursor.fetchone()[0]
 
+            # How much sharing saves: references against the entries behind them
+            references = self._reader_connection.execute("SELECT COUNT(*) FROM search_results").fetchone()[0]
+            candidates = self._reader_connection.execute("SELECT COUNT(*) FROM search_candidates").fetchone()[0]
+            entries = self._reader_connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
             return {
                 "video_cache": {
                     "total": video_stats[0],
@@ -223,22 +976,47 @@ class CacheStore:
                     "misses": video_stats[2]
                 },
                 "search_cache": {
-                    "total": search_count
+                    "total": search_count,
+                    "references": references,
+                    "candidates": candidates,
+                    "entries": entries,
                 },
-                "db_path": str(self.db_path)
             }
 
         except sqlite3.Error as e:
             print(f"[CACHE] Error getting stats: {e}")
             return {"error": str(e)}
 
+    def _close_reader(self):
+        if self._reader_connection is not None:
+            self._reader_connection.close()
+            self._reader_connection = None
+
     def cleanup(self):
+        """
+        Commit whatever is still queued and stop both threads. A temporary
+        database is deleted; a persistent one is checkpointed and kept for the
+        next process.
+        """
+        self.memory.clear()
+
         try:
-            if hasattr(self, 'connection'):
+            if self._writer.is_alive():
+                self._writes.put(None)
+                self._writer.join()
+
+            self._reader.submit(self._close_reader).result()
+            self._reader.shutdown(wait=True)
+
+            if self.persistent:
+                self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
                 self.connection.close()
-            if hasattr(self, 'db_path') and self.db_path.exists():
-                self.db_path.unlink()
-            if hasattr(self, 'temp_dir') and os.path.exists(self.temp_dir):
+                print(f"[CACHE] Closed persistent cache database at {self.db_path}")
+                return
+
+            self.connection.close()
+            self._delete_database_files()
+            if self.temp_dir and os.path.exists(self.temp_dir):
                 os.rmdir(self.temp_dir)
 
             print("[CACHE] Cleaned up temporary cache database")
@@ -246,16 +1024,32 @@ class CacheStore:
         except Exception as e:
             print(f"[CACHE] Error during cleanup: {e}")
 
+# Keyed by config.CACHE_BACKEND. Every one of them satisfies CacheBackend.
+CACHE_BACKENDS: Dict[str, Callable[[], CacheBackend]] = {
+    "sqlite": CacheStore,
+    "memory": MemoryCacheBackend,
+    "redis": RedisCacheBackend,
+}
+
+
+def create_cache_store(kind: str = config.CACHE_BACKEND) -> CacheBackend:
+    """Build the configured backend. An unknown name is fatal, so a typo surfaces at startup."""
+    factory = CACHE_BACKENDS.get(kind.lower())
+    if factory is None:
+        known = ", ".join(sorted(CACHE_BACKENDS))
+        raise ValueError(f"Unknown cache backend {kind!r}. Known backends: {known}")
+    return factory()
+
 # This will be set by the FastAPI lifespan context
-_app_cache_store: Optional[CacheStore] = None
+_app_cache_store: Optional[CacheBackend] = None
 
-def get_cache_store() -> CacheStore:
+def get_cache_store() -> CacheBackend:
     """Get the cache store instance managed by FastAPI lifespan"""
     if _app_cache_store is None:
         raise RuntimeError("Cache store not initialized. This should be called within FastAPI context.")
     return _app_cache_store
 
-def set_cache_store(cache_store: CacheStore) -> None:
+def set_cache_store(cache_store: CacheBackend) -> None:
     """Set the cache store instance (called by FastAPI lifespan)"""
     global _app_cache_store
     _app_cache_store = cache_store
@@ -7,6 +7,7 @@ from nanoid import generate as generate_nanoid
 from core.search import KaraokeEntry
 from core.player import DisplayPlayerState
 from core.room import MIN_SCORED_SECONDS
+from services.extraction_scheduler import ExtractionPriority
 from services.karaoke_service import KaraokeService
 from client_manager import ConnectionClient
 from session_manager import SessionManager
@@ -28,6 +29,10 @@ class ClientCommands:
         self.client = client
         self.session_manager = session_manager
         self.room = None
+
+    def close(self):
+        """Called once the socket has closed, to stop work done for this client."""
+        pass
         
     async def _receive_current_state(self):
         if not self.client.room_id:
@@ -122,29 +127,34 @@ class ClientCommands:
 
         print(f"[PREFETCH] Starting prefetch for {len(songs_to_prefetch)} songs in room {self.client.room_id}")
 
-        tasks = []
-        for item in songs_to_prefetch:
-            task = self._prefetch_single_video_url(item)
-            tasks.append(task)
-
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-
-    async def _prefetch_single_video_url(self, queue_item):
-        """Prefetch video URL for a single queue item"""
         try:
-            print(f"[PREFETCH] Fetching URL for: {queue_item.entry.title} by {queue_item.entry.artist}")
-            video_response = await self.service.get_video_url(queue_item.entry)
+            # One call for the lot, so the misses share a yt-dlp run. Every
+            # queue change lands here, often several times before the first
+            # extraction returns; the service joins those to the one already
+            # running rather than starting another. With the next song in the
+            # batch it waits in the scheduler as next-up, not as a prefetch.
+            next_up = songs_to_prefetch[0] is self.room.queue.items[0]
+            video_responses = await self.service.get_video_urls(
+                [item.entry for item in songs_to_prefetch],
+                priority=ExtractionPriority.NEXT_UP if next_up else ExtractionPriority.PREFETCH,
+                room_id=self.client.room_id,
+            )
+        except Exception as e:
+            # Silent failure - client will handle fetching if needed
+            print(f"[PREFETCH] ✗ Failed to prefetch URLs in room {self.client.room_id}: {e}")
+            return
+
+        prefetched = False
+        for queue_item, video_response in zip(songs_to_prefetch, video_responses):
             if video_response.video_url:
                 queue_item.entry.video_url = video_response.video_url
+                prefetched = True
                 print(f"[PREFETCH] ✓ Successfully prefetched URL for: {queue_item.entry.title}")
-                await self._broadcast_room_state(should_prefetch=False)
             else:
                 print(f"[PREFETCH] ✗ No URL found for: {queue_item.entry.title}")
 
-        except Exception as e:
-            # Silent failure - client will handle fetching if needed
-            print(f"[PREFETCH] ✗ Failed to prefetch URL for {queue_item.entry.title}: {e}")
+        if prefetched:
+            await self._broadcast_room_state(should_prefetch=False)
 
     async def _remove_song(self, item_id: str):
         removed = self.room.remove_song(item_id)
@@ -193,6 +203,81 @@ class ClientCommands:
         return {"advanced": next_song is not None}
 
 class ControllerCommands(ClientCommands):
+    def __init__(self, client: ConnectionClient, session_manager: SessionManager, service: KaraokeService) -> None:
+        super().__init__(client, session_manager, service)
+        # The streamed search this remote is waiting on. Each keystroke that
+        # settles starts another, and only the newest is worth finishing.
+        self._search_task: asyncio.Task | None = None
+
+    def close(self):
+        # Nobody is left to send the frames to, and cancelling lets go of the
+        # search flight if this remote was its only waiter.
+        if self._search_task and not self._search_task.done():
+            self._search_task.cancel()
+
+    async def search(self, payload):
+        """Search, sending the first page as search_results frames.
+
+        A frame goes out each time another source answers, so the list starts
+        filling as soon as the fastest one does; each carries a generation
+        that only grows, and the last is marked done. Answers at once with the
+        search_id, rather than holding the remote's other commands behind a
+        search.
+        """
+        if not self.room:
+            raise ValueError("Join a room before searching")
+
+        if self._search_task and not self._search_task.done():
+            self._search_task.cancel()
+
+        search_id = payload["search_id"] or generate_nanoid()
+        self._search_task = asyncio.create_task(
+            self._stream_search(search_id, payload["query"], payload["limit"])
+        )
+        return {"search_id": search_id}
+
+    async def _stream_search(self, search_id: str, query: str, limit: int):
+        generation = 0
+        stream = self.service.search_stream(query, limit)
+        try:
+            while True:
+                try:
+                    progress = await anext(stream)
+                except StopAsyncIteration:
+                    return
+                except Exception as e:
+                    print(f"[SEARCH] Streamed search for {query!r} failed: {e}")
+                    frame = {
+                        "entries": [],
+                        "total": 0,
+                        "complete": True,
+                        "pending": [],
+                        "done": True,
+                        "error": str(e) or type(e).__name__,
+                    }
+                else:
+                    frame = {
+                        "entries": [entry.model_dump() for entry in progress.result.entries],
+                        "total": progress.result.total,
+                        "complete": progress.result.complete,
+                        "pending": progress.pending,
+                        "done": not progress.pending,
+                    }
+
+                generation += 1
+                try:
+                    await self.client.send_command("search_results", {
+                        "search_id": search_id, "generation": generation, **frame,
+                    })
+                except Exception:
+                    # However a send fails, the socket is no use any more, and
+                    # another frame down it would only fail again.
+                    return
+                if "error" in frame:
+                    return
+        finally:
+            await stream.aclose()
+
     async def remove_song(self, payload):
         await self._remove_song(payload["entry_id"])
 
@@ -353,7 +438,9 @@ class DisplayCommands(ClientCommands):
         if not entry or entry.id != payload["entry_id"]:
             return {"refreshed": False}
 
-        response = await self.service.get_video_url(entry, refresh=True)
+        response = await self.service.get_video_url(
+            entry, refresh=True, priority=ExtractionPriority.ON_AIR, room_id=self.room.id
+        )
         if not response.video_url:
             print(f"[DEBUG] Could not re-resolve a URL for {entry.id}")
             return {"refreshed": False}
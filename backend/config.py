@@ -15,6 +15,13 @@ def _float_env(name: str, default: float) -> float:
         return default
 
 
+def _int_env(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, ""))
+    except ValueError:
+        return default
+
+
 class Config:
     """Application configuration class."""
     PROXY_SERVER: str = os.getenv("PROXY_SERVER", "")  # Proxy server URL (e.g., "http://proxy:8080")
@@ -23,9 +30,30 @@ class Config:
     YTDLP_RUNTIME: str = os.getenv("YTDLP_RUNTIME", "bun")  # JavaScript runtime for yt-dlp ('node', 'bun', etc.)
     YTDLP_BINARY: str = os.getenv("YTDLP_BINARY", "yt-dlp")  # yt-dlp executable name or path
     YTDLP_TIMEOUT_SECONDS: float = _float_env("YTDLP_TIMEOUT_SECONDS", 45.0)  # Hard limit per yt-dlp invocation
+    EXTRACTION_CONCURRENCY: int = _int_env("EXTRACTION_CONCURRENCY", 2)  # Provider extractions at once; at most YTDLP_WORKERS less EXTRACT_HEDGE_MAX, or the rest wait in the pool unprioritised
+    EXTRACT_HEDGE_MAX: int = _int_env("EXTRACT_HEDGE_MAX", 1)  # Second attempts for slow extractions in flight at once, process wide; 0 disables hedging; a hedge starts only on an idle worker
+    YTDLP_WORKERS: int = _int_env("YTDLP_WORKERS", EXTRACTION_CONCURRENCY + EXTRACT_HEDGE_MAX)  # Long lived extraction processes, by default one per extraction and hedge; 0 runs the CLI once per URL
+    YTDLP_WORKER_MAX_JOBS: int = _int_env("YTDLP_WORKER_MAX_JOBS", 50)  # Extractions before a worker is replaced
+    YTDLP_AUTO_UPDATE: bool = os.getenv("YTDLP_AUTO_UPDATE", "0") == "1"  # Install the latest yt-dlp beside this one in the background, switching once the canary resolves
+    YTDLP_CACHE_DIR: str = os.getenv("YTDLP_CACHE_DIR", "")  # yt-dlp's player and signature cache; empty uses yt-dlp/ under CACHE_DIR, else a fixed temp dir
+    YTDLP_CANARY_VIDEO_ID: str = os.getenv("YTDLP_CANARY_VIDEO_ID", "jNQXAC9IVRw")  # Extracted at startup to warm that cache; empty skips the warmup
     YTDLP_EXTRA_ARGS: str = os.getenv("YTDLP_EXTRA_ARGS", "")  # Extra CLI flags, shell quoted
     SEARCH_TIMEOUT_SECONDS: float = _float_env("SEARCH_TIMEOUT_SECONDS", 20.0)  # Hard limit per search
+    SEARCH_DEADLINE_SECONDS: float = _float_env("SEARCH_DEADLINE_SECONDS", 2.5)  # Answer with the sources heard from by then; 0 waits for all
+    SEARCH_THREADS: int = _int_env("SEARCH_THREADS", 4)  # Searches run at once, each thread keeping its own YoutubeDL
+    SEARCH_CLIENT_MAX_USES: int = _int_env("SEARCH_CLIENT_MAX_USES", 200)  # Searches before a thread's YoutubeDL is rebuilt
+    SEARCH_CLIENT_MAX_AGE_SECONDS: float = _float_env("SEARCH_CLIENT_MAX_AGE_SECONDS", 1800.0)  # Age at which it is rebuilt regardless
     KARAOKE_SOURCES: list[str] = _list_env("KARAOKE_SOURCES")  # Provider IDs to enable; empty enables all
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "sqlite")  # sqlite, memory, or redis to share one cache between workers and hosts
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")  # Used by the redis backend; rediss:// for TLS
+    CACHE_REDIS_PREFIX: str = os.getenv("CACHE_REDIS_PREFIX", "karaoke:")  # Prefix on every key the redis backend writes
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "")  # Keeps the cache database across restarts; empty uses a temp dir deleted on shutdown
+    CACHE_MEMORY_MAX_ENTRIES: int = _int_env("CACHE_MEMORY_MAX_ENTRIES", 2048)  # Decoded results held in process; 0 disables
+    CACHE_MAX_ROWS: int = _int_env("CACHE_MAX_ROWS", 50000)  # Per cache table, least recently read evicted first; 0 disables
+    SEARCH_CACHE_STALE_SECONDS: float = _float_env("SEARCH_CACHE_STALE_SECONDS", 6 * 3600.0)  # Expired search results still served while refreshing
+    CACHE_SWEEP_INTERVAL_SECONDS: float = _float_env("CACHE_SWEEP_INTERVAL_SECONDS", 300.0)  # Between cache maintenance sweeps
+    VIDEO_URL_REFRESH_INTERVAL_SECONDS: float = _float_env("VIDEO_URL_REFRESH_INTERVAL_SECONDS", 60.0)  # Between checks of queued URLs for expiry
+    VIDEO_URL_REFRESH_AHEAD_SECONDS: float = _float_env("VIDEO_URL_REFRESH_AHEAD_SECONDS", 20 * 60.0)  # Queued URLs expiring sooner are resolved again
 
 
 # Global configuration instance
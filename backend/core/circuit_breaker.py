@@ -0,0 +1,136 @@
+import time
+from collections import deque
+from typing import Optional
+
+# Failures in a row that open a breaker, and how long it stays open before a
+# probe is let through.
+FAILURE_THRESHOLD = 5
+COOLDOWN_SECONDS = 30.0
+
+# Successful calls kept to read percentiles from, per breaker.
+LATENCY_WINDOW = 100
+
+# Below this many samples the percentile says little, and the ceiling is used
+# instead.
+LATENCY_MIN_SAMPLES = 10
+
+# A call may take this many times the slowest recent successful ones before it
+# is given up on. Headroom for a slow moment without waiting out a dead source.
+TIMEOUT_LATENCY_MULTIPLIER = 3.0
+TIMEOUT_PERCENTILE = 0.99
+
+
+class CircuitBreaker:
+    """
+    Stops calling a source that keeps failing, and sizes timeouts to how long
+    it actually takes.
+
+    Closed, every call goes through. After `failure_threshold` failures in a
+    row it opens, and calls are turned away without being made, so a source
+    that times out costs nothing rather than a full timeout per call. After
+    the cooldown it goes half-open and lets one probe through: a success
+    closes it, a failure opens it for another cooldown.
+
+    Timeouts are read from the latencies of recent successful calls, so a
+    source answering in two seconds is not waited on for twenty when it hangs.
+    `timeout_bounds` are the floor and the ceiling; the ceiling is what a
+    call gets until there are latencies to go on.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout_bounds: tuple[float, float],
+        failure_threshold: int = FAILURE_THRESHOLD,
+        cooldown_seconds: float = COOLDOWN_SECONDS,
+    ):
+        self.name = name
+        self.min_timeout_seconds, self.max_timeout_seconds = timeout_bounds
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+        self.latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {"opened": 0, "rejected": 0, "probes": 0}
+
+    @property
+    def rejecting(self) -> bool:
+        """Whether a call now would be turned away, without claiming the probe."""
+        if self.state == "closed":
+            return False
+        if self.state == "open":
+            return time.monotonic() - self.opened_at < self.cooldown_seconds
+        return self.probe_in_flight
+
+    def allow(self) -> bool:
+        """
+        Whether to make a call. In half-open, a True is the probe, and the
+        caller owes a record_success, record_failure or abandon.
+        """
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            self.state = "half_open"
+            print(f"[BREAKER] {self.name} half-open, probing")
+
+        if self.state == "closed":
+            return True
+        if self.state == "half_open" and not self.probe_in_flight:
+            self.probe_in_flight = True
+            self.stats["probes"] += 1
+            return True
+
+        self.stats["rejected"] += 1
+        return False
+
+    def record_success(self, latency: Optional[float] = None):
+        if latency is not None:
+            self.latencies.append(latency)
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        if self.state != "closed":
+            print(f"[BREAKER] {self.name} closed")
+            self.state = "closed"
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def abandon(self):
+        """The call was cancelled before it said anything about the source."""
+        self.probe_in_flight = False
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """A percentile of recent successful latencies, or None with too few to go on."""
+        if len(self.latencies) < LATENCY_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def timeout(self) -> float:
+        """How long to give the next call: the recent worst case with headroom."""
+        worst = self.percentile(TIMEOUT_PERCENTILE)
+        if worst is None:
+            return self.max_timeout_seconds
+        adaptive = worst * TIMEOUT_LATENCY_MULTIPLIER
+        return min(self.max_timeout_seconds, max(self.min_timeout_seconds, adaptive))
+
+    def _open(self):
+        if self.state != "open":
+            self.stats["opened"] += 1
+            print(f"[BREAKER] {self.name} open after {self.consecutive_failures} failures")
+        self.state = "open"
+        self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "timeout_seconds": round(self.timeout(), 2),
+            "p50_seconds": round(ordered[len(ordered) // 2], 3) if ordered else None,
+            "samples": len(ordered),
+            **self.stats,
+        }
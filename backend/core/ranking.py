@@ -7,8 +7,16 @@ platform specific, and keeping it here is what lets results from different
 sources be ordered against each other rather than concatenated.
 """
 
+import hashlib
 import math
 import re
+from functools import lru_cache
+from itertools import chain
+from operator import attrgetter
+from typing import Sequence
+
+import ahocorasick
+import numpy as np
 
 from core.search import SearchCandidate
 
@@ -47,6 +55,10 @@ POSITION_PENALTY = 0.15
 # song that was actually asked for.
 QUERY_MATCH_WEIGHT = 6.0
 
+# Bump when score_candidates or is_singable change in a way the constants above
+# do not show. Cached lists ranked under another version are ranked again.
+RANKING_REVISION = 1
+
 
 def query_tokens(query: str) -> list[str]:
     return re.findall(r"\w+", query.lower(), flags=re.UNICODE)
@@ -58,25 +70,97 @@ def query_match_ratio(title: str, tokens: list[str]) -> float:
     return sum(1 for token in tokens if token in title) / len(tokens)
 
 
-def score_candidate(candidate: SearchCandidate, tokens: list[str], curated: bool = False) -> float:
-    entry = candidate.entry
-    signals = candidate.signals
-    title = entry.title.lower()
-    uploader = entry.uploader.lower()
+def _matcher(words: Sequence[str]) -> "ahocorasick.Automaton":
+    """One automaton over distinct `words`, each found by its index among them."""
+    automaton = ahocorasick.Automaton()
+    for index, word in enumerate(words):
+        automaton.add_word(word, index)
+    automaton.make_automaton()
+    return automaton
 
-    score = QUERY_MATCH_WEIGHT * query_match_ratio(title, tokens)
-    score += TITLE_MARKER_WEIGHT * sum(1 for marker in KARAOKE_TITLE_MARKERS if marker in title)
-    score -= NON_KARAOKE_PENALTY * sum(1 for marker in NON_KARAOKE_TITLE_MARKERS if marker in title)
 
-    if curated or any(marker in uploader for marker in KARAOKE_UPLOADER_MARKERS):
-        score += KARAOKE_UPLOADER_WEIGHT
+UPLOADER_MATCHER = _matcher(KARAOKE_UPLOADER_MARKERS)
 
-    if signals.verified:
-        score += VERIFIED_WEIGHT
+# Joins a batch's titles into one text. No marker or query token contains it,
+# so no match spans two candidates.
+BATCH_SEPARATOR = "\n"
 
-    score += POPULARITY_WEIGHT * min(math.log10(signals.popularity + 1), POPULARITY_CEILING)
 
-    return score - POSITION_PENALTY * signals.position
+@lru_cache(maxsize=256)
+def _title_matcher(tokens: tuple[str, ...]) -> tuple["ahocorasick.Automaton", np.ndarray]:
+    """
+    One automaton over the title markers and a query's tokens, with a weight
+    per word for each of the three things a title is counted for: the query's
+    tokens, karaoke markers and non-karaoke markers. A word can be more than
+    one, such as a query for "karaoke", and a repeated token counts twice.
+    """
+    sets = (tokens, KARAOKE_TITLE_MARKERS, NON_KARAOKE_TITLE_MARKERS)
+    words = tuple(dict.fromkeys(tokens + KARAOKE_TITLE_MARKERS + NON_KARAOKE_TITLE_MARKERS))
+    weights = np.array([[words_in.count(word) for words_in in sets] for word in words], dtype=float)
+    return _matcher(words), weights
+
+
+def _presence(matcher: "ahocorasick.Automaton", texts: list[str], width: int) -> np.ndarray:
+    """
+    A (len(texts), width) array with 1 where the word at that index occurs in
+    that text, from one pass of `matcher` over all of them joined.
+    """
+    present = np.zeros((len(texts), width))
+    # Each match is an (end, index) pair. Flattened, they load as one array.
+    matches = np.fromiter(chain.from_iterable(matcher.iter(BATCH_SEPARATOR.join(texts))), dtype=np.int64)
+    if matches.size:
+        ends, words = matches.reshape(-1, 2).T
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        starts = np.cumsum(lengths + len(BATCH_SEPARATOR)) - lengths - len(BATCH_SEPARATOR)
+        present[np.searchsorted(starts, ends, side="right") - 1, words] = 1.0
+    return present
+
+
+def score_candidate(candidate: SearchCandidate, tokens: list[str], curated: bool = False) -> float:
+    return score_candidates([candidate], tokens, curated)[0]
+
+
+def score_candidates(
+    candidates: Sequence[SearchCandidate], tokens: list[str], curated: bool = False
+) -> list[float]:
+    """
+    One score per candidate, in order, for candidates from one source.
+
+    One Aho-Corasick pass over the batch's titles finds every marker and query
+    token in all of them, where score_candidate used to scan each title once
+    per marker. The rest is scored as arrays, adding the terms in the order
+    score_candidate always did so the floats come out equal.
+    """
+    if not candidates:
+        return []
+
+    count = len(candidates)
+    titles = list(map(str.lower, map(attrgetter("entry.title"), candidates)))
+    matcher, weights = _title_matcher(tuple(tokens))
+    matched, karaoke, non_karaoke = (_presence(matcher, titles, len(weights)) @ weights).T
+    ratio = matched / len(tokens) if tokens else np.ones(count)
+
+    if curated:
+        uploaded = np.ones(count)
+    else:
+        uploaders = list(map(str.lower, map(attrgetter("entry.uploader"), candidates)))
+        uploaded = _presence(UPLOADER_MATCHER, uploaders, len(KARAOKE_UPLOADER_MARKERS)).any(axis=1)
+
+    def signal(name: str) -> np.ndarray:
+        return np.fromiter(map(attrgetter(f"signals.{name}"), candidates), dtype=float, count=count)
+
+    # np.log10 lands an ulp away from math.log10 on about one value in a
+    # hundred, which is enough to swap two candidates that tie.
+    popularity = np.fromiter(map(math.log10, (signal("popularity") + 1).tolist()), dtype=float, count=count)
+
+    scores = QUERY_MATCH_WEIGHT * ratio
+    scores += TITLE_MARKER_WEIGHT * karaoke
+    scores -= NON_KARAOKE_PENALTY * non_karaoke
+    scores += KARAOKE_UPLOADER_WEIGHT * uploaded
+    scores += VERIFIED_WEIGHT * signal("verified")
+    scores += POPULARITY_WEIGHT * np.minimum(popularity, POPULARITY_CEILING)
+    scores -= POSITION_PENALTY * signal("position")
+    return scores.tolist()
 
 
 def is_singable(candidate: SearchCandidate, min_duration: float, max_duration: float) -> bool:
@@ -88,6 +172,23 @@ def is_singable(candidate: SearchCandidate, min_duration: float, max_duration: f
     return min_duration <= duration <= max_duration
 
 
+def ranking_version(*settings) -> str:
+    """
+    Identifies how a ranked list was ordered: the weights and markers above,
+    RANKING_REVISION, and whatever `settings` the caller ranks with besides,
+    such as each source's duration bounds. A list cached under one version is
+    ranked again from its candidates when read under another.
+    """
+    fingerprint = repr((
+        RANKING_REVISION,
+        KARAOKE_TITLE_MARKERS, NON_KARAOKE_TITLE_MARKERS, KARAOKE_UPLOADER_MARKERS,
+        TITLE_MARKER_WEIGHT, NON_KARAOKE_PENALTY, KARAOKE_UPLOADER_WEIGHT, VERIFIED_WEIGHT,
+        POPULARITY_WEIGHT, POPULARITY_CEILING, POSITION_PENALTY, QUERY_MATCH_WEIGHT,
+        settings,
+    ))
+    return hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+
+
 def enhance_query_with_keywords(query: str, keywords: list[str]) -> str:
     """
     Steer a search towards karaoke cuts without drowning out the song.
@@ -3,10 +3,14 @@ import time
 from pydantic import BaseModel, Field
 from typing import Optional
 
+from core.circuit_breaker import CircuitBreaker
+
 # Suits a general video platform. Anime openings run well under this floor.
 DEFAULT_MIN_DURATION_SECONDS = 90.0
 DEFAULT_MAX_DURATION_SECONDS = 15 * 60.0
 
+DEFAULT_SEARCH_CACHE_TTL_SECONDS = 30 * 60
+
 
 class KaraokeEntry(BaseModel):
     id: str  # Unique only within its source
@@ -36,7 +40,12 @@ class KaraokeSearchResult(BaseModel):
     """The HTTP response. Providers return candidates and never build this."""
 
     entries: list[KaraokeEntry]
+    # How many are ranked so far. Until complete, paging past it fetches more.
     total: int = 0
+    complete: bool = True
+    # Sources that missed the search deadline and are not ranked in here.
+    # Their results reach the cache when they answer.
+    pending: list[str] = []
 
 
 class VideoURLResult(BaseModel):
@@ -120,8 +129,22 @@ class KaraokeSourceProvider:
     min_duration_seconds: float = DEFAULT_MIN_DURATION_SECONDS
     max_duration_seconds: float = DEFAULT_MAX_DURATION_SECONDS
 
+    # How long this source's search results are reused before it is asked
+    # again. Each source's are cached on their own, so a source whose catalogue
+    # rarely changes can keep them longer than one that changes by the hour.
+    search_cache_ttl_seconds: int = DEFAULT_SEARCH_CACHE_TTL_SECONDS
+
+    # Floor and ceiling, in seconds, of the timeouts the breakers size from
+    # observed latency. The ceiling holds until there is latency to go on.
+    search_timeout_bounds: tuple[float, float] = (3.0, 20.0)
+    extract_timeout_bounds: tuple[float, float] = (10.0, 45.0)
+
     def __init__(self) -> None:
         self.health = ProviderHealth()
+        # The service records searches; resolving is recorded by the provider,
+        # which alone can tell a failing source from a video that is gone.
+        self.search_breaker = CircuitBreaker(f"{type(self).__name__} search", self.search_timeout_bounds)
+        self.extract_breaker = CircuitBreaker(f"{type(self).__name__} extract", self.extract_timeout_bounds)
 
     @property
     def provider_id(self) -> str:
@@ -138,10 +161,12 @@ class KaraokeSourceProvider:
         """
         return self.health.snapshot()
 
-    async def search(self, query: str) -> list[SearchCandidate]:
+    async def search(self, query: str, depth: int) -> list[SearchCandidate]:
         """
-        Everything that survives source specific filtering, unranked and
-        untrimmed. Trimming here hides candidates that outrank ours elsewhere.
+        Everything among the source's first `depth` results that survives
+        source specific filtering, unranked and untrimmed. Trimming here hides
+        candidates that outrank ours elsewhere. A source that cannot stop early
+        may return more; one that has fewer returns what it has.
 
         Raise on failure. The service isolates each provider and records it;
         an empty list instead reads as a song nobody has uploaded.
@@ -152,5 +177,27 @@ class KaraokeSourceProvider:
         """Build the result with resolved(), unavailable() or failed()."""
         return VideoURLResult.failed()
 
+    async def get_video_urls(self, entries: list[KaraokeEntry]) -> list[VideoURLResult]:
+        """
+        One result per entry, in order. Override when the source can resolve
+        several in one request; the default resolves them one by one.
+        """
+        return [await self.get_video_url(entry) for entry in entries]
+
+    def video_url_expires_at(self, video_url: str) -> Optional[float]:
+        """
+        When a URL this provider resolved stops playing, as a Unix timestamp,
+        or None when it does not expire or the provider cannot tell. Queued
+        URLs due to expire are resolved again before they come up.
+        """
+        return None
+
+    async def start(self):
+        """
+        Called once at server startup. Start background work here, such as
+        warming a cache, rather than in __init__, which runs at import.
+        """
+        pass
+
     async def close(self):
         pass
@@ -1,6 +1,7 @@
 from typing_extensions import Annotated
 from pathlib import Path
 from os import environ
+import asyncio
 import time
 from contextlib import asynccontextmanager
 
@@ -21,11 +22,14 @@ from services.karaoke_service import (
     MAX_SEARCH_LIMIT,
     SOURCE_REGISTRY,
 )
+from services.extraction_scheduler import ExtractionPriority
+from services.video_url_refresher import VideoURLRefresher
 from commands import ControllerCommands, DisplayCommands
 from websocket_errors import WebSocketErrorType, create_error_response
 from websocket_models import validate_websocket_message, QUIET_COMMANDS
 from session_manager import SessionManager
-from cache_store import get_cache_store, set_cache_store, clear_cache_store, CacheStore
+from cache_backend import CacheBackend
+from cache_store import get_cache_store, set_cache_store, clear_cache_store, create_cache_store
 
 # Request/Response models
 class CreateRoomRequest(BaseModel):
@@ -53,11 +57,18 @@ class RoomFoundResponse(BaseModel):
 async def lifespan(app: FastAPI):
     # Startup
     print("[STARTUP] Karaoke server starting up...")
-    cache = CacheStore()
+    cache = create_cache_store()
     set_cache_store(cache)
-    print(f"[STARTUP] Cache initialized: {cache.get_stats()}")
+    print(f"[STARTUP] Cache initialized: {await cache.get_stats()}")
+    if cache.persistent:
+        print(f"[STARTUP] Warmed {await cache.warm_memory()} cached results from the last run")
+    # Nothing else deletes expired rows, so without this the database grows
+    # for as long as the process lives.
+    cache_maintenance = asyncio.create_task(cache.run_maintenance())
+    url_refresh = asyncio.create_task(video_url_refresher.run())
 
     print(f"[STARTUP] Sources enabled: {', '.join(SOURCE_REGISTRY.ids)}")
+    await SOURCE_REGISTRY.start()
     sources = await KaraokeService().get_health()
     for provider_id, state in sources["providers"].items():
         if state["available"]:
@@ -70,7 +81,14 @@ async def lifespan(app: FastAPI):
     # Shutdown
     print("[SHUTDOWN] Karaoke server shutting down...")
     await SOURCE_REGISTRY.close()
+    for task in (url_refresh, cache_maintenance):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
     cache = get_cache_store()
+    await cache.flush()
     cache.cleanup()
     clear_cache_store()
     print("[SHUTDOWN] Cleanup completed")
@@ -103,10 +121,11 @@ app.add_middleware(
 )
 
 session_manager = SessionManager()
+video_url_refresher = VideoURLRefresher(session_manager)
 security = HTTPBasic()
 
 # Dependencies
-def get_cache() -> CacheStore:
+def get_cache() -> CacheBackend:
     return get_cache_store()
 
 def get_current_room(credentials: HTTPBasicCredentials = Depends(security)) -> Room:
@@ -185,19 +204,20 @@ async def search(
 async def get_video_url(
     entry: KaraokeEntry,
     service: Annotated[KaraokeService, Depends()],
-    _: Annotated[str, Depends(get_current_room)]
+    room: Annotated[Room, Depends(get_current_room)]
 ) -> VideoURLResponse:
-    return await service.get_video_url(entry)
+    # Asked for by a screen about to play the song, so it goes ahead of prefetches.
+    return await service.get_video_url(entry, priority=ExtractionPriority.ON_AIR, room_id=room.id)
 
 @app.get("/health")
 async def get_health(
-    cache: Annotated[CacheStore, Depends(get_cache)],
+    cache: Annotated[CacheBackend, Depends(get_cache)],
     service: Annotated[KaraokeService, Depends()],
     response: Response
 ):
     """Get WebSocket connection health metrics"""
     health_metrics = session_manager.get_health_metrics()
-    cache_stats = cache.get_stats()
+    cache_stats = await cache.get_stats()
 
     # Reports unhealthy once no source can resolve a video, so the container
     # healthcheck catches it rather than leaving songs to queue and stall.
@@ -209,7 +229,8 @@ async def get_health(
     return {
         **health_metrics,
         "cache": cache_stats,
-        "sources": sources
+        "sources": sources,
+        "video_url_refresh": video_url_refresher.stats
     }
 
 @app.get("/heartbeat")
@@ -260,6 +281,7 @@ async def websocket_endpoint(websocket: WebSocket, service: Annotated[KaraokeSer
         # Manager already disconnected the websocket
         return
 
+    commands = None
     try:
         commands = ControllerCommands(client, session_manager, service)
         if client.client_type == "display":
@@ -338,6 +360,8 @@ async def websocket_endpoint(websocket: WebSocket, service: Annotated[KaraokeSer
     except (WebSocketDisconnect, Exception) as e:
         print(f"[ERROR] {e}")
         # Handle all disconnection scenarios
+        if commands is not None:
+            commands.close()
         await session_manager.disconnect_client(client)
 
 # Static files + SPA fallback, must stay after all API routes
@@ -0,0 +1,161 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator, Iterable, Optional
+
+
+class ExtractionPriority(IntEnum):
+    """Lower runs first. A class waits only while a more urgent one is queued."""
+
+    # The song playing now stopped, or the screen is about to start it.
+    ON_AIR = 0
+    # First in a queue, so the next song a room will sing.
+    NEXT_UP = 1
+    # Further down a queue, or a URL renewed before it expires.
+    PREFETCH = 2
+    # Nobody has asked for it yet.
+    SPECULATIVE = 3
+
+
+class _Ticket:
+    def __init__(self, priority: ExtractionPriority, room: str, keys: frozenset[str]):
+        self.priority = priority
+        self.room = room
+        self.keys = keys
+        self.queued_at = time.monotonic()
+        self.admitted = asyncio.get_running_loop().create_future()
+
+
+class _ClassStats:
+    def __init__(self):
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float):
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+
+class ExtractionScheduler:
+    """
+    Admits provider extractions up to a global cap, most urgent class first.
+
+    Within a class rooms take turns: each room waits in its own line and the
+    scheduler admits from the next room in rotation, so a party queueing forty
+    songs holds one place in the rotation, not forty ahead of everyone else.
+
+    A waiter can be promoted when a more urgent caller joins the work it is
+    waiting to run, so a prefetch that an on-air request now depends on does
+    not keep its prefetch place in line.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.running = 0
+        # Per class, room -> that room's line, in rotation order.
+        self._lines: dict[ExtractionPriority, "OrderedDict[str, deque[_Ticket]]"] = {
+            priority: OrderedDict() for priority in ExtractionPriority
+        }
+        self._stats = {priority: _ClassStats() for priority in ExtractionPriority}
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: ExtractionPriority,
+        room: Optional[str] = None,
+        keys: Iterable[str] = (),
+    ) -> AsyncIterator[None]:
+        """Hold one of the capacity slots for the length of the block."""
+        ticket = _Ticket(priority, room or "", frozenset(keys))
+        if self.running < self.capacity and not self._queued():
+            self.running += 1
+            self._stats[priority].record(0.0)
+        else:
+            self._lines[priority].setdefault(ticket.room, deque()).append(ticket)
+            try:
+                await ticket.admitted
+            except asyncio.CancelledError:
+                if ticket.admitted.done() and not ticket.admitted.cancelled():
+                    # Admitted in the same tick it was cancelled: the slot is
+                    # ours, and has to be passed on.
+                    self._release()
+                else:
+                    self._withdraw(ticket)
+                raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def promote(self, key: str, priority: ExtractionPriority):
+        """Move a queued ticket carrying this key up to priority, if that is higher."""
+        for current in ExtractionPriority:
+            if current <= priority:
+                continue
+            for room, line in list(self._lines[current].items()):
+                for ticket in list(line):
+                    if key in ticket.keys:
+                        self._withdraw(ticket)
+                        ticket.priority = priority
+                        self._lines[priority].setdefault(room, deque()).append(ticket)
+
+    def _queued(self) -> bool:
+        return any(self._lines[priority] for priority in ExtractionPriority)
+
+    def _withdraw(self, ticket: _Ticket):
+        lines = self._lines[ticket.priority]
+        line = lines.get(ticket.room)
+        if line is not None and ticket in line:
+            line.remove(ticket)
+            if not line:
+                del lines[ticket.room]
+
+    def _release(self):
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.running < self.capacity:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            if ticket.admitted.cancelled():
+                continue
+            self.running += 1
+            self._stats[ticket.priority].record(time.monotonic() - ticket.queued_at)
+            ticket.admitted.set_result(None)
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        for priority in ExtractionPriority:
+            lines = self._lines[priority]
+            if not lines:
+                continue
+            room, line = next(iter(lines.items()))
+            ticket = line.popleft()
+            # The room goes to the back of the rotation, or out of it if empty.
+            del lines[room]
+            if line:
+                lines[room] = line
+            return ticket
+        return None
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        classes = {}
+        for priority in ExtractionPriority:
+            waiting = [ticket for line in self._lines[priority].values() for ticket in line]
+            stats = self._stats[priority]
+            classes[priority.name.lower()] = {
+                "queued": len(waiting),
+                "rooms_waiting": len(self._lines[priority]),
+                "oldest_wait_seconds": round(max((now - t.queued_at for t in waiting), default=0.0), 3),
+                "admitted": stats.admitted,
+                "average_wait_seconds": round(stats.total_wait / stats.admitted, 3) if stats.admitted else 0.0,
+                "max_wait_seconds": round(stats.max_wait, 3),
+            }
+        return {"capacity": self.capacity, "running": self.running, "classes": classes}
@@ -1,26 +1,68 @@
 import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple, Optional
 
 from pydantic import BaseModel, ValidationError
 from typing_extensions import Annotated
 from fastapi import Depends
 
-from core.ranking import is_singable, query_tokens, score_candidate
+from core.ranking import is_singable, query_tokens, ranking_version, score_candidates
 from core.search import (
     KaraokeSearchResult,
     KaraokeEntry,
     KaraokeSourceProvider,
     SearchCandidate,
+    VideoURLResult,
 )
 from source_providers.registry import build_registry
-from cache_store import get_cache_store, CacheStore
+from cache_backend import MISSING, CacheBackend, CachedCandidates, MemoryTier, SearchPage
+from cache_store import get_cache_store
 from config import config
+from single_flight import SingleFlight
+from services.extraction_scheduler import ExtractionPriority, ExtractionScheduler
 
 # Built once and shared. KaraokeService is constructed through Depends on every
 # call, so anything a provider accumulates (health, sessions, rate limit state)
 # would otherwise reset each time.
 SOURCE_REGISTRY = build_registry(config.KARAOKE_SOURCES)
 
-SEARCH_CACHE_TTL_SECONDS = 30 * 60
+# How deep a query is fetched, in results per source. The first depth answers
+# the first pages, which is as far as most singers look, for one results page
+# upstream rather than three. The next is fetched only once a client pages past
+# what the first ranked, and the last is as deep as a query goes.
+SEARCH_DEPTHS = (20, 60)
+
+# Refreshes of stale search results in flight, by cache key, so a stale list
+# read by a whole room starts one upstream search rather than one per read.
+# Module level for the same reason as SOURCE_REGISTRY.
+SEARCH_REFRESHES: dict[str, asyncio.Task] = {}
+
+# Upstream searches and extractions in flight, by cache key. Five phones
+# searching the same song, or one song queued in three rooms, share one call.
+SEARCH_FLIGHTS: SingleFlight[tuple[list[KaraokeEntry], bool, Optional[int]]] = SingleFlight("search")
+
+# The latest partial ranking of each search in flight, by search key, for
+# callers that stop waiting at SEARCH_DEADLINE_SECONDS. A flight they leave
+# behind is held in LATE_SEARCHES until it lands, so it still gets cached.
+SEARCH_PROGRESS: dict[str, "SearchBoard"] = {}
+LATE_SEARCHES: set[asyncio.Task] = set()
+SEARCH_DEADLINE_STATS = {"partial_answers": 0, "late_completed": 0}
+VIDEO_URL_FLIGHTS: "SingleFlight[VideoURLResponse]" = SingleFlight("video_url")
+
+# Cached lists being ranked again under a new ranking version, by cache key, so
+# a room reading one after a deploy ranks and stores it once.
+RERANK_FLIGHTS: "SingleFlight[Optional[list[KaraokeEntry]]]" = SingleFlight("rerank")
+
+# Cached lists found to have no candidates to rank again from, by search key
+# and the version they were ranked under, so every read of one does not start
+# another attempt. Tried again after RERANK_RETRY_SECONDS, in case a process
+# still running the old ranking stored it again with candidates.
+UNRANKABLE_LISTS = MemoryTier(1000)
+RERANK_RETRY_SECONDS = 10 * 60
+
+# Every provider extraction waits here for a slot, most urgent first and rooms
+# taking turns, so a song that stopped on air is not queued behind prefetches.
+EXTRACTION_SCHEDULER = ExtractionScheduler(config.EXTRACTION_CONCURRENCY)
 
 DEFAULT_SEARCH_LIMIT = 12
 MAX_SEARCH_LIMIT = 50
@@ -30,15 +72,55 @@ class VideoURLResponse(BaseModel):
     video_url: str | None
 
 
+# A candidate with the tier it was fetched in: 0 for the first fetch of a query,
+# one more for each deeper fetch after it.
+TieredCandidate = tuple[int, SearchCandidate]
+
+
 class ProviderSearchOutcome:
-    def __init__(self, provider: KaraokeSourceProvider, candidates: list[SearchCandidate], ok: bool):
+    def __init__(
+        self,
+        provider: KaraokeSourceProvider,
+        candidates: list[SearchCandidate],
+        ok: bool,
+        cached_until: Optional[float] = None,
+    ):
         self.provider = provider
         self.candidates = candidates
         self.ok = ok
+        # Set when the candidates came from the provider's own cached results,
+        # to when those stop being fresh. None for a search just made.
+        self.cached_until = cached_until
+
+    def fresh_for(self, now: float) -> float:
+        """How much longer a list ranked from these candidates stays fresh."""
+        if self.cached_until is None:
+            return self.provider.search_cache_ttl_seconds
+        return self.cached_until - now
+
+
+class SearchProgress(NamedTuple):
+    """One step of a streamed search: the page as ranked so far."""
+
+    result: KaraokeSearchResult
+    # Providers yet to answer. Empty on the last step, which is final.
+    pending: list[str]
+
+
+class SearchBoard:
+    """Where a search in flight posts its ranking each time a provider answers."""
+
+    def __init__(self):
+        self.step: Optional[tuple[list[KaraokeEntry], list[str]]] = None
+        self.posted = asyncio.Event()
+
+    def post(self, step: tuple[list[KaraokeEntry], list[str]]):
+        self.step = step
+        self.posted.set()
 
 
 class KaraokeService:
-    def __init__(self, cache: Annotated[CacheStore, Depends(get_cache_store)] = None):
+    def __init__(self, cache: Annotated[CacheBackend, Depends(get_cache_store)] = None):
         self.providers = SOURCE_REGISTRY
         self.cache = cache
 
@@ -50,7 +132,13 @@ class KaraokeService:
         providers = {}
         for provider in self.providers.all():
             try:
-                providers[provider.provider_id] = await provider.check_health()
+                providers[provider.provider_id] = {
+                    **await provider.check_health(),
+                    "breakers": {
+                        "search": provider.search_breaker.snapshot(),
+                        "extract": provider.extract_breaker.snapshot(),
+                    },
+                }
             except Exception as e:
                 print(f"[SERVICE] Health check failed for {provider.provider_id}: {e}")
                 providers[provider.provider_id] = {
@@ -60,7 +148,18 @@ class KaraokeService:
 
         return {
             "available": any(p.get("available") for p in providers.values()),
-            "providers": providers
+            "providers": providers,
+            "in_flight": {
+                "search": SEARCH_FLIGHTS.get_stats(),
+                "video_url": VIDEO_URL_FLIGHTS.get_stats(),
+                "rerank": RERANK_FLIGHTS.get_stats(),
+            },
+            "extraction": EXTRACTION_SCHEDULER.get_stats(),
+            "search_deadline": {
+                "seconds": config.SEARCH_DEADLINE_SECONDS,
+                **SEARCH_DEADLINE_STATS,
+                "late_in_flight": len(LATE_SEARCHES),
+            },
         }
 
     async def search(
@@ -69,90 +168,545 @@ class KaraokeService:
         limit: int = DEFAULT_SEARCH_LIMIT,
         offset: int = 0,
     ) -> KaraokeSearchResult:
-        """Return one page of matches, with the count of everything behind it."""
+        """
+        Return one page of matches, with the count of those ranked so far.
+
+        A query is fetched only as deep as the pages asked of it. A page past
+        the end of a shallow list fetches deeper, keeping what was already
+        ranked in place.
+
+        Past SEARCH_DEADLINE_SECONDS the page is ranked from the providers
+        that have answered, and names the rest as pending. The search carries
+        on without the caller, and the full list is cached when it lands.
+        """
         normalized = query.strip()
         if not normalized:
             return KaraokeSearchResult(entries=[], total=0)
 
-        entries = await self._ranked_entries(normalized)
-        return KaraokeSearchResult(entries=entries[offset:offset + limit], total=len(entries))
+        cached, depth, earlier = await self._plan_search(normalized, offset, limit)
+        if cached is not None:
+            return cached
 
-    async def _search_provider(self, provider: KaraokeSourceProvider, query: str) -> ProviderSearchOutcome:
-        """A source that is down costs the others nothing but the results it owed."""
+        flight = asyncio.ensure_future(self._ranked_entries(normalized, depth, earlier, wanted=offset + limit))
         try:
-            return ProviderSearchOutcome(provider, await provider.search(query), True)
+            partial = await self._await_deadline(flight, self._search_key(normalized))
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        if partial is not None:
+            entries, pending = partial
+            result = self._page(entries, offset, limit, depth)
+            result.pending = pending
+            return result
+
+        entries, _, recorded_depth = await flight
+        return self._page(entries, offset, limit, recorded_depth)
+
+    async def _await_deadline(
+        self, flight: asyncio.Future, key: str
+    ) -> Optional[tuple[list[KaraokeEntry], list[str]]]:
+        """
+        Wait on a search until the deadline, then take what has been ranked so
+        far, or None once the search has finished. With nothing answered by
+        the deadline, the first source to answer is still worth waiting on.
+        """
+        if config.SEARCH_DEADLINE_SECONDS <= 0:
+            return None
+
+        await asyncio.wait({flight}, timeout=config.SEARCH_DEADLINE_SECONDS)
+        board = SEARCH_PROGRESS.get(key)
+        if flight.done() or board is None:
+            return None
+
+        if board.step is None:
+            posted = asyncio.ensure_future(board.posted.wait())
+            try:
+                await asyncio.wait({flight, posted}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                posted.cancel()
+            if flight.done():
+                return None
+
+        # Left running, still a waiter on the flight, so it is not cancelled
+        # for want of one and caches the full list when the rest answer.
+        LATE_SEARCHES.add(flight)
+        flight.add_done_callback(self._late_search_done)
+        SEARCH_DEADLINE_STATS["partial_answers"] += 1
+        return board.step
+
+    @staticmethod
+    def _late_search_done(flight: asyncio.Future):
+        LATE_SEARCHES.discard(flight)
+        if flight.cancelled():
+            return
+        if flight.exception() is not None:
+            print(f"[SERVICE] Search finished after its deadline failed: {flight.exception()}")
+        else:
+            SEARCH_DEADLINE_STATS["late_completed"] += 1
+
+    async def search_stream(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> AsyncIterator[SearchProgress]:
+        """
+        The first page of a search, ranked again each time another provider
+        answers, so it starts filling as soon as the fastest source does.
+
+        The last step is the page search() would return, and is what gets
+        cached. Steps before it rank only the sources heard from so far, and
+        can reorder once the rest arrive. A search already running for the
+        query is joined, and then only its final page is seen.
+        """
+        normalized = query.strip()
+        if not normalized:
+            yield SearchProgress(KaraokeSearchResult(entries=[], total=0), [])
+            return
+
+        cached, depth, earlier = await self._plan_search(normalized, 0, limit)
+        if cached is not None:
+            yield SearchProgress(cached, [])
+            return
+
+        steps: asyncio.Queue[tuple[list[KaraokeEntry], list[str]]] = asyncio.Queue()
+        flight = asyncio.ensure_future(self._ranked_entries(normalized, depth, earlier, steps.put_nowait))
+        try:
+            while not flight.done():
+                step = asyncio.ensure_future(steps.get())
+                await asyncio.wait({step, flight}, return_when=asyncio.FIRST_COMPLETED)
+                if not step.done():
+                    step.cancel()
+                    break
+                entries, pending = step.result()
+                yield SearchProgress(self._page(entries, 0, limit, depth), pending)
+
+            entries, _, recorded_depth = await flight
+            yield SearchProgress(self._page(entries, 0, limit, recorded_depth), [])
+        finally:
+            # A client that moved on to another query stops waiting; the
+            # search itself carries on only for whoever else joined it.
+            flight.cancel()
+
+    async def _plan_search(
+        self, query: str, offset: int, limit: int
+    ) -> tuple[Optional[KaraokeSearchResult], int, list[TieredCandidate]]:
+        """
+        The page from the cache when it holds it. Otherwise the depth to fetch
+        to, and the candidates of the cached shallower list, which a deeper
+        fetch has to keep in place.
+        """
+        wanted = offset + limit
+        if not self.cache:
+            return None, self._depth_for(wanted), []
+
+        # The cache reads and decodes only the page, however long the list.
+        cached = await self.cache.get_search_page(query, offset, limit, scope=self._cache_scope())
+        if cached is None:
+            return None, self._depth_for(wanted), []
+        if cached.ranking != self._ranking_version():
+            cached = await self._reranked_page(query, cached, offset, limit)
+
+        try:
+            result = KaraokeSearchResult(
+                entries=[KaraokeEntry(**entry) for entry in cached.entries],
+                total=cached.total,
+                complete=cached.depth is None,
+            )
+        except (ValidationError, TypeError) as e:
+            print(f"[SERVICE] Discarding cached results for {query!r}: {e}")
+            return None, self._depth_for(wanted), []
+
+        # A stale list is still a good answer to hand back now; the singer
+        # should not wait on the refresh.
+        if cached.stale:
+            self._refresh_in_background(query, cached.depth)
+        if result.complete or wanted <= cached.total:
+            return result, cached.depth, []
+
+        earlier = await self._cached_candidates(query)
+        return None, self._depth_for(wanted, cached.depth), earlier
+
+    @staticmethod
+    def _page(entries: list[KaraokeEntry], offset: int, limit: int, depth: Optional[int]) -> KaraokeSearchResult:
+        return KaraokeSearchResult(
+            entries=entries[offset:offset + limit],
+            total=len(entries),
+            complete=depth is None,
+        )
+
+    @staticmethod
+    def _depth_for(wanted: int, fetched: int = 0) -> int:
+        """
+        The shallowest depth past `fetched` expected to rank `wanted` results.
+        Filtering can leave a depth ranking fewer than it fetched, so the same
+        depth again would never get there.
+        """
+        for depth in SEARCH_DEPTHS:
+            if depth > fetched and depth >= wanted:
+                return depth
+        return SEARCH_DEPTHS[-1]
+
+    async def _cached_candidates(self, query: str) -> list[TieredCandidate]:
+        """What a cached list was ranked from, or nothing if it is gone or unreadable."""
+        held = await self.cache.get_search_candidates(query, scope=self._cache_scope())
+        return self._decode_candidates(query, held)
+
+    @staticmethod
+    def _decode_candidates(query: str, held: Optional[CachedCandidates]) -> list[TieredCandidate]:
+        if held is None:
+            return []
+        try:
+            return [
+                (record["tier"], SearchCandidate(entry=record["entry"], signals=record["signals"]))
+                for record in held.records
+            ]
+        except (ValidationError, TypeError, KeyError) as e:
+            print(f"[SERVICE] Discarding cached candidates for {query!r}: {e}")
+            return []
+
+    async def _reranked_page(self, query: str, cached: SearchPage, offset: int, limit: int) -> SearchPage:
+        """
+        A page of a list cached under another ranking version, ranked again
+        from its candidates without asking the sources, and stored under the
+        current version so the next read finds it ranked. A list cached
+        without candidates is served as it was, and not tried again for a
+        while.
+        """
+        key = self._search_key(query)
+        if UNRANKABLE_LISTS.get((key, cached.ranking)) is not MISSING:
+            return cached
+
+        entries = await RERANK_FLIGHTS.run(key, lambda: self._rerank_cached(query))
+        if entries is None:
+            UNRANKABLE_LISTS.put((key, cached.ranking), True, time.time() + RERANK_RETRY_SECONDS)
+            return cached
+        return cached._replace(
+            entries=[entry.model_dump() for entry in entries[offset:offset + limit]],
+            total=len(entries),
+            ranking=self._ranking_version(),
+        )
+
+    async def _rerank_cached(self, query: str) -> Optional[list[KaraokeEntry]]:
+        held = await self.cache.get_search_candidates(query, scope=self._cache_scope())
+        candidates = self._decode_candidates(query, held)
+        if not candidates:
+            return None
+
+        scored = self._rank(query, candidates)
+        # Keeps the freshness it was fetched with: ranking again is not
+        # fetching again, and a stale list is still refreshed.
+        self._cache_ranked(query, scored, candidates, held.fresh_until - time.time(), held.depth)
+        print(f"[SERVICE] Ranked cached results for {query!r} again under the current ranking")
+        return [entry for _, entry in scored]
+
+    def _refresh_in_background(self, query: str, depth: Optional[int]):
+        key = self._search_key(query)
+        if key in SEARCH_REFRESHES:
+            return
+
+        async def refresh():
+            try:
+                # As deep as the stale list went, ranked afresh.
+                _, cached, _ = await self._ranked_entries(query, depth or SEARCH_DEPTHS[-1])
+            except Exception as e:
+                print(f"[SERVICE] Refreshing stale results for {query!r} failed: {e}")
+                cached = False
+            # Not cached means a source failed or nothing came back, and the
+            # stale list stays in place until the grace window closes.
+            self.cache.record_revalidation(cached)
+
+        task = asyncio.create_task(refresh())
+        SEARCH_REFRESHES[key] = task
+        task.add_done_callback(lambda _: SEARCH_REFRESHES.pop(key, None))
+
+    async def _search_provider(
+        self, provider: KaraokeSourceProvider, query: str, depth: int
+    ) -> ProviderSearchOutcome:
+        """
+        A source that is down costs the others nothing but the results it owed,
+        and while its breaker is open, not even the wait for it to time out.
+        """
+        breaker = provider.search_breaker
+        if not breaker.allow():
+            return ProviderSearchOutcome(provider, [], False)
+
+        timeout = breaker.timeout()
+        started = time.monotonic()
+        try:
+            candidates = await asyncio.wait_for(provider.search(query, depth), timeout=timeout)
+        except asyncio.CancelledError:
+            breaker.abandon()
+            raise
         except Exception as e:
-            detail = str(e) or type(e).__name__
+            breaker.record_failure()
+            if isinstance(e, asyncio.TimeoutError):
+                detail = f"Search timed out after {timeout:.1f}s"
+            else:
+                detail = str(e) or type(e).__name__
             provider.health.record_failure(detail)
             print(f"[SERVICE] Search failed for {provider.provider_id}: {detail}")
             return ProviderSearchOutcome(provider, [], False)
 
-    async def _ranked_entries(self, query: str) -> list[KaraokeEntry]:
+        breaker.record_success(time.monotonic() - started)
+        return ProviderSearchOutcome(provider, candidates, True)
+
+    async def _ranked_entries(
+        self,
+        query: str,
+        depth: int,
+        earlier: list[TieredCandidate] = (),
+        on_progress: Optional[Callable[[tuple[list[KaraokeEntry], list[str]]], None]] = None,
+        wanted: Optional[int] = None,
+    ) -> tuple[list[KaraokeEntry], bool, Optional[int]]:
         """
-        Every match for a query, in rank order.
+        The matches for a query among each provider's first `depth` results,
+        in rank order; whether the list was complete enough to cache; and the
+        depth to record for it, None once that was as deep as a query goes.
 
         Cached whole rather than by page, so asking for more results costs
         nothing upstream and the ranking cannot shift under a singer part way
-        down the list.
+        down the list. For the same reason a deeper fetch keeps `earlier`, the
+        candidates already ranked, with the signals they were ranked by, and
+        ranks only what it adds, in a tier after them.
+
+        The candidates are cached with the list, so a change to the ranking
+        is taken up by ranking them again on the next read, not by fetching.
+
+        One search of a query runs at a time. One at least `depth` deep is
+        joined. A shallower one is waited on and then deepened from what it
+        ranked, unless that already ranks `wanted` matches, rather than every
+        source being asked twice at once.
+
+        `on_progress` is handed the list ranked from the providers heard from
+        so far, with the IDs of those still out, each time one answers before
+        the last. Only when this call starts the search; one joined is already
+        reporting to whoever started it.
         """
-        if self.cache:
-            cached = self.cache.get_search_results(query, scope=self._cache_scope())
-            if cached is not None:
-                try:
-                    return [KaraokeEntry(**entry) for entry in cached.get("entries", [])]
-                except (ValidationError, TypeError) as e:
-                    print(f"[SERVICE] Discarding cached results for {query!r}: {e}")
-
-        providers = self.providers.all()
-        outcomes = await asyncio.gather(*(self._search_provider(p, query) for p in providers))
-
-        tokens = query_tokens(query)
-        scored: list[tuple[float, KaraokeEntry]] = []
-        seen: set[tuple[str, str]] = set()
-
-        for outcome in outcomes:
-            provider = outcome.provider
-            for candidate in outcome.candidates:
-                key = (candidate.entry.source, candidate.entry.id)
-                if key in seen:
-                    continue
-
-                if not is_singable(candidate, provider.min_duration_seconds, provider.max_duration_seconds):
-                    continue
+        running = [d for d in sorted({*SEARCH_DEPTHS, depth}) if self._flight_key(query, d) in SEARCH_FLIGHTS]
+        deep_enough = [d for d in running if d >= depth]
+        if running and not deep_enough:
+            shallower = running[-1]
+            ranked = await SEARCH_FLIGHTS.run(
+                self._flight_key(query, shallower),
+                lambda: self._fetch_ranked_entries(query, shallower, earlier, None),
+            )
+            if wanted is not None and len(ranked[0]) >= wanted:
+                return ranked
+            if self.cache:
+                earlier = await self._cached_candidates(query)
+            return await self._ranked_entries(query, depth, earlier, on_progress, wanted)
 
-                seen.add(key)
-                scored.append((
-                    score_candidate(candidate, tokens, curated=provider.curated),
-                    candidate.entry,
-                ))
+        depth = deep_enough[0] if deep_enough else depth
+        return await SEARCH_FLIGHTS.run(
+            self._flight_key(query, depth),
+            lambda: self._fetch_ranked_entries(query, depth, earlier, on_progress),
+        )
 
-        # A stable sort leaves equally scored results in registry order.
-        scored.sort(key=lambda ranked: ranked[0], reverse=True)
+    async def _fetch_ranked_entries(
+        self,
+        query: str,
+        depth: int,
+        earlier: list[TieredCandidate],
+        on_progress: Optional[Callable[[tuple[list[KaraokeEntry], list[str]]], None]],
+    ) -> tuple[list[KaraokeEntry], bool, Optional[int]]:
+        providers = self.providers.all()
+        searches = [asyncio.ensure_future(self._provider_outcome(p, query, depth)) for p in providers]
+        key = self._search_key(query)
+        board = SEARCH_PROGRESS[key] = SearchBoard()
+        try:
+            if len(searches) > 1:
+                for answered in asyncio.as_completed(searches):
+                    await answered
+                    pending = [p.provider_id for p, search in zip(providers, searches) if not search.done()]
+                    if pending:
+                        heard = [search.result() for search in searches if search.done()]
+                        ranked = self._rank(query, self._merge(earlier, heard))
+                        step = ([entry for _, entry in ranked], pending)
+                        board.post(step)
+                        if on_progress is not None:
+                            on_progress(step)
+            outcomes = await asyncio.gather(*searches)
+        finally:
+            if SEARCH_PROGRESS.get(key) is board:
+                del SEARCH_PROGRESS[key]
+            for search in searches:
+                search.cancel()
+
+        candidates = self._merge(earlier, outcomes)
+        scored = self._rank(query, candidates)
         entries = [entry for _, entry in scored]
 
         # A partial result caches a source's outage for the next half hour, and
         # an empty one is usually a failure rather than a song nobody uploaded.
-        if self.cache and entries and all(outcome.ok for outcome in outcomes):
-            self.cache.cache_search_results(
+        # Each source that did answer is still cached on its own, so the next
+        # search asks only the one that failed.
+        cacheable = bool(entries) and all(outcome.ok for outcome in outcomes)
+        recorded_depth = None if depth >= SEARCH_DEPTHS[-1] else depth
+        if self.cache:
+            await self._cache_outcomes(query, outcomes, recorded_depth)
+        if self.cache and cacheable and not await self._deeper_list_cached(query, recorded_depth):
+            # Fresh only as long as the stalest source it was ranked from.
+            now = time.time()
+            ttl_seconds = min(outcome.fresh_for(now) for outcome in outcomes)
+            self._cache_ranked(query, scored, candidates, ttl_seconds, recorded_depth)
+
+        return entries, cacheable, recorded_depth
+
+    def _cache_ranked(
+        self,
+        query: str,
+        scored: list[tuple[float, KaraokeEntry]],
+        candidates: list[TieredCandidate],
+        ttl_seconds: float,
+        depth: Optional[int],
+        providers: Optional[list[KaraokeSourceProvider]] = None,
+    ):
+        """Store a list ranked from `providers`, every registered one by default."""
+        self.cache.cache_search_results(
+            query,
+            [(score, entry.model_dump()) for score, entry in scored],
+            ttl_seconds,
+            scope=self._cache_scope(providers),
+            depth=depth,
+            candidates=[{"tier": tier, **candidate.model_dump()} for tier, candidate in candidates],
+            ranking=self._ranking_version(providers),
+        )
+
+    async def _cache_outcomes(self, query: str, outcomes: list[ProviderSearchOutcome], depth: Optional[int]):
+        """
+        Each source's fresh answer, cached as a search of that source alone:
+        under its own scope, for its own TTL, ranked as it would be were it
+        the only source enabled, which is then what it is read as.
+        """
+        if len(outcomes) < 2:
+            # The list ranked from all of them is this one.
+            return
+        for outcome in outcomes:
+            if not outcome.ok or not outcome.candidates or outcome.cached_until is not None:
+                continue
+            if await self._deeper_list_cached(query, depth, [outcome.provider]):
+                continue
+            candidates = [(0, candidate) for candidate in outcome.candidates]
+            self._cache_ranked(
                 query,
-                {"entries": [entry.model_dump() for entry in entries]},
-                SEARCH_CACHE_TTL_SECONDS,
-                scope=self._cache_scope(),
+                self._rank(query, candidates),
+                candidates,
+                outcome.provider.search_cache_ttl_seconds,
+                depth,
+                [outcome.provider],
             )
 
-        return entries
+    async def _deeper_list_cached(
+        self, query: str, depth: Optional[int], providers: Optional[list[KaraokeSourceProvider]] = None
+    ) -> bool:
+        """
+        Whether the cache holds a fresh list of the query, ranked from
+        `providers`, fetched deeper than `depth`. A shallow search landing
+        after a deep one would otherwise replace the longer list, and the
+        pages past its end would be fetched again. A stale one is on its way
+        out and is replaced.
+        """
+        held = await self.cache.get_search_candidates(query, scope=self._cache_scope(providers))
+        if held is None or held.fresh_until <= time.time() or depth is None:
+            return False
+        return held.depth is None or held.depth > depth
+
+    async def _provider_outcome(
+        self, provider: KaraokeSourceProvider, query: str, depth: int
+    ) -> ProviderSearchOutcome:
+        """The source's own cached answer while it is fresh and deep enough, else a search of it."""
+        if self.cache and len(self.providers) > 1:
+            held = await self.cache.get_search_candidates(query, scope=self._cache_scope([provider]))
+            if (held is not None and held.fresh_until > time.time()
+                    and (held.depth is None or held.depth >= depth)):
+                candidates = [candidate for _, candidate in self._decode_candidates(query, held)]
+                if candidates:
+                    return ProviderSearchOutcome(provider, candidates, True, held.fresh_until)
+
+        return await self._search_provider(provider, query, depth)
+
+    @staticmethod
+    def _merge(earlier: list[TieredCandidate], outcomes: list[ProviderSearchOutcome]) -> list[TieredCandidate]:
+        """
+        `earlier` as it was, then what the outcomes add to it as the next tier.
+        A candidate fetched again keeps the signals it was first ranked by, or
+        its place could shift. Outcomes go in registry order.
+        """
+        tier = max((tier for tier, _ in earlier), default=-1) + 1
+        seen: set[tuple[str, str]] = {(candidate.entry.source, candidate.entry.id) for _, candidate in earlier}
+        merged = list(earlier)
+        for outcome in outcomes:
+            for candidate in outcome.candidates:
+                key = (candidate.entry.source, candidate.entry.id)
+                if key not in seen:
+                    seen.add(key)
+                    merged.append((tier, candidate))
+        return merged
+
+    def _rank(self, query: str, candidates: list[TieredCandidate]) -> list[tuple[float, KaraokeEntry]]:
+        """
+        Every singable candidate, a tier at a time, each tier by score. Scored
+        as one batch per source, against that source's duration bounds.
+        Equal scores keep the order the candidates were fetched in, which is
+        registry order.
+        """
+        tokens = query_tokens(query)
+        by_source: dict[str, list[int]] = {}
+        for index, (_, candidate) in enumerate(candidates):
+            by_source.setdefault(candidate.entry.source, []).append(index)
+
+        scores: dict[int, float] = {}
+        for source, indices in by_source.items():
+            provider = self.providers.get(source)
+            if provider is None:
+                continue
+            picked = [
+                index for index in indices
+                if is_singable(candidates[index][1], provider.min_duration_seconds, provider.max_duration_seconds)
+            ]
+            batch = score_candidates([candidates[index][1] for index in picked], tokens, curated=provider.curated)
+            scores.update(zip(picked, batch))
+
+        order = sorted(scores, key=lambda index: (candidates[index][0], -scores[index], index))
+        return [(scores[index], candidates[index][1].entry) for index in order]
+
+    def _ranking_version(self, providers: Optional[list[KaraokeSourceProvider]] = None) -> str:
+        """Changes with anything the ranking reads besides the candidates themselves."""
+        return ranking_version(*(
+            (provider.provider_id, provider.min_duration_seconds, provider.max_duration_seconds, provider.curated)
+            for provider in (self.providers.all() if providers is None else providers)
+        ))
+
+    def _cache_scope(self, providers: Optional[list[KaraokeSourceProvider]] = None) -> str:
+        """
+        The sources a list was ranked from. Without this, a page built while a
+        source was down outlives its recovery. One source's own results are
+        scoped to it alone, so they outlive a change to the others.
+        """
+        if providers is None:
+            return ",".join(sorted(self.providers.ids))
+        return ",".join(sorted(provider.provider_id for provider in providers))
+
+    def _flight_key(self, query: str, depth: int) -> str:
+        return f"{self._search_key(query)}|{depth}"
 
-    def _cache_scope(self) -> str:
-        """Without this, a page built while a source was down outlives its recovery."""
-        return ",".join(sorted(self.providers.ids))
+    def _search_key(self, query: str) -> str:
+        # Same identity the cache gives the query, so whatever would share a
+        # cached list also shares the search that fills it.
+        return f"{self._cache_scope()}|{query.lower()}"
 
-    async def get_video_url(self, entry: KaraokeEntry, refresh: bool = False) -> VideoURLResponse:
+    async def get_video_url(
+        self,
+        entry: KaraokeEntry,
+        refresh: bool = False,
+        priority: ExtractionPriority = ExtractionPriority.NEXT_UP,
+        room_id: Optional[str] = None,
+    ) -> VideoURLResponse:
         """
         Resolve a playable URL through the provider that owns the entry.
 
         `refresh` re-resolves even when a URL is already in hand, for the case
         where the one we have has stopped playing. Provider URLs expire, so a
         cached copy of a dead link is worse than none.
+
+        `priority` and `room_id` place the extraction, if one is needed, in
+        EXTRACTION_SCHEDULER.
         """
         if refresh:
             if self.cache:
@@ -163,22 +717,122 @@ class KaraokeService:
             return VideoURLResponse(video_url=entry.video_url)
 
         if self.cache:
-            cached_url = self.cache.get_video_url(entry.id, entry.source)
+            cached_url = await self.cache.get_video_url(entry.id, entry.source)
             if cached_url is not None:
                 return VideoURLResponse(video_url=cached_url or None)
 
+        key = self._video_key(entry)
+        if key in VIDEO_URL_FLIGHTS:
+            EXTRACTION_SCHEDULER.promote(key, priority)
+        return await VIDEO_URL_FLIGHTS.run(key, lambda: self._resolve_video_url(entry, priority, room_id))
+
+    async def get_video_urls(
+        self,
+        entries: list[KaraokeEntry],
+        priority: ExtractionPriority = ExtractionPriority.PREFETCH,
+        room_id: Optional[str] = None,
+    ) -> list[VideoURLResponse]:
+        """
+        Resolve a whole queue's URLs, one response per entry, in order.
+
+        URLs in hand and cache hits are answered directly. The misses go to
+        their provider in one batch, except those something else is already
+        resolving, which are joined instead of being asked for twice.
+        """
+        responses: list[Optional[VideoURLResponse]] = [None] * len(entries)
+        misses: dict[str, list[int]] = {}
+        for index, entry in enumerate(entries):
+            if entry.video_url:
+                responses[index] = VideoURLResponse(video_url=entry.video_url)
+                continue
+            if self.cache:
+                cached_url = await self.cache.get_video_url(entry.id, entry.source)
+                if cached_url is not None:
+                    responses[index] = VideoURLResponse(video_url=cached_url or None)
+                    continue
+            misses.setdefault(entry.source, []).append(index)
+
+        waiting: list[tuple[int, Awaitable[VideoURLResponse]]] = []
+        for source, indexes in misses.items():
+            batched: dict[str, KaraokeEntry] = {}
+            for index in indexes:
+                key = self._video_key(entries[index])
+                if key not in VIDEO_URL_FLIGHTS:
+                    batched.setdefault(key, entries[index])
+
+            batch = None
+            if batched:
+                batch = asyncio.ensure_future(self._resolve_video_urls(source, batched, priority, room_id))
+            for index in indexes:
+                key = self._video_key(entries[index])
+                if key in batched:
+                    work = lambda key=key: self._batched_video_url(batch, key)
+                else:
+                    EXTRACTION_SCHEDULER.promote(key, priority)
+                    work = lambda entry=entries[index]: self._resolve_video_url(entry, priority, room_id)
+                waiting.append((index, VIDEO_URL_FLIGHTS.run(key, work)))
+
+        for (index, _), response in zip(waiting, await asyncio.gather(*(wait for _, wait in waiting))):
+            responses[index] = response
+
+        return responses
+
+    @staticmethod
+    async def _batched_video_url(batch: asyncio.Future, key: str) -> VideoURLResponse:
+        # Shielded: one caller giving up must not cancel the rest of its batch.
+        results = await asyncio.shield(batch)
+        return results.get(key) or VideoURLResponse(video_url=None)
+
+    async def _resolve_video_urls(
+        self,
+        source: str,
+        entries: dict[str, KaraokeEntry],
+        priority: ExtractionPriority,
+        room_id: Optional[str],
+    ) -> dict[str, VideoURLResponse]:
+        provider = self.providers.get(source)
+        if provider is None:
+            print(f"[SERVICE] No provider registered for source {source!r}")
+            return {}
+        if provider.extract_breaker.rejecting:
+            # Failed, not cached, and answered without waiting on a slot.
+            return {}
+
+        try:
+            # The batch runs as one extraction, so it takes one slot.
+            async with EXTRACTION_SCHEDULER.slot(priority, room_id, entries.keys()):
+                results = await provider.get_video_urls(list(entries.values()))
+        except Exception as e:
+            print(f"[SERVICE] Provider {provider.provider_id} failed for a batch of {len(entries)}: {e}")
+            provider.health.record_failure(str(e))
+            return {}
+
+        return {
+            key: self._store_video_url(entry, result)
+            for (key, entry), result in zip(entries.items(), results)
+        }
+
+    async def _resolve_video_url(
+        self, entry: KaraokeEntry, priority: ExtractionPriority, room_id: Optional[str]
+    ) -> VideoURLResponse:
         provider = self.providers.get(entry.source)
         if provider is None:
             print(f"[SERVICE] No provider registered for source {entry.source!r}")
             return VideoURLResponse(video_url=None)
+        if provider.extract_breaker.rejecting:
+            return VideoURLResponse(video_url=None)
 
         try:
-            result = await provider.get_video_url(entry)
+            async with EXTRACTION_SCHEDULER.slot(priority, room_id, [self._video_key(entry)]):
+                result = await provider.get_video_url(entry)
         except Exception as e:
             print(f"[SERVICE] Provider {provider.provider_id} failed for {entry.id}: {e}")
             provider.health.record_failure(str(e))
             return VideoURLResponse(video_url=None)
 
+        return self._store_video_url(entry, result)
+
+    def _store_video_url(self, entry: KaraokeEntry, result: VideoURLResult) -> VideoURLResponse:
         if self.cache and result.cacheable:
             self.cache.cache_video_url(
                 entry.id,
@@ -188,3 +842,7 @@ class KaraokeService:
             )
 
         return VideoURLResponse(video_url=result.video_url)
+
+    @staticmethod
+    def _video_key(entry: KaraokeEntry) -> str:
+        return f"{entry.source}|{entry.id}"
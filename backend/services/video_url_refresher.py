@@ -0,0 +1,133 @@
+import asyncio
+import time
+from typing import Optional
+
+from core.queue import KaraokeQueueItem
+from core.room import Room
+from services.extraction_scheduler import ExtractionPriority
+from services.karaoke_service import KaraokeService
+from session_manager import SessionManager
+from cache_store import get_cache_store
+from config import config
+
+
+class VideoURLRefresher:
+    """
+    Re-resolves queued URLs before they expire.
+
+    A URL is resolved once, when the song is queued or prefetched, and can sit
+    in a long queue for longer than it stays signed. Left alone, the display
+    finds out at the start of the song and the singer waits on a refresh.
+    """
+
+    def __init__(
+        self,
+        session_manager: SessionManager,
+        ahead_seconds: float = config.VIDEO_URL_REFRESH_AHEAD_SECONDS,
+    ):
+        self.session_manager = session_manager
+        self.ahead_seconds = ahead_seconds
+        self.stats = {"checked": 0, "refreshed": 0, "failed": 0, "last_run_at": None}
+
+    async def run(self, interval_seconds: float = config.VIDEO_URL_REFRESH_INTERVAL_SECONDS):
+        """Refresh forever. Started as a task by the FastAPI lifespan, which cancels it."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.refresh_due()
+            except Exception as e:
+                print(f"[REFRESH] Video URL refresh failed: {e}")
+
+    async def refresh_due(self) -> int:
+        """Refresh every queued URL expiring within the lead time, across all rooms."""
+        service = KaraokeService(get_cache_store())
+        deadline = time.time() + self.ahead_seconds
+
+        due: list[tuple[Room, KaraokeQueueItem]] = []
+        for room in list(self.session_manager.room_manager.rooms.values()):
+            for item in room.queue.items:
+                if not item.entry.video_url:
+                    continue
+                provider = service.providers.get(item.entry.source)
+                if provider is None:
+                    continue
+                self.stats["checked"] += 1
+                expires_at = provider.video_url_expires_at(item.entry.video_url)
+                if expires_at is not None and expires_at <= deadline:
+                    due.append((room, item))
+
+        self.stats["last_run_at"] = time.time()
+        if not due:
+            return 0
+
+        print(f"[REFRESH] Re-resolving {len(due)} queued video URLs close to expiry")
+        stale_urls = [item.entry.video_url for _, item in due]
+        # One call per room, so the extraction scheduler can take turns between
+        # them. A room whose next song is due asks at next-up priority.
+        by_room: dict[str, list[int]] = {}
+        for index, (room, _) in enumerate(due):
+            by_room.setdefault(room.id, []).append(index)
+        outcomes = await asyncio.gather(
+            *(self._resolve(service, [due[i] for i in indexes]) for indexes in by_room.values())
+        )
+        responses: list[Optional[str]] = [None] * len(due)
+        for indexes, urls in zip(by_room.values(), outcomes):
+            for index, video_url in zip(indexes, urls):
+                responses[index] = video_url
+
+        refreshed = [
+            self._apply(item, stale_url, video_url)
+            for (_, item), stale_url, video_url in zip(due, stale_urls, responses)
+        ]
+
+        # One queue_update per room however many of its items changed. The
+        # version stays put, as with a prefetch: the queue itself has not.
+        rooms = {room.id: room for (room, _), ok in zip(due, refreshed) if ok}
+        for room_id, room in rooms.items():
+            if self.session_manager.room_manager.rooms.get(room_id) is room:
+                await self.session_manager.broadcast_to_room(room_id, "queue_update", room.get_queue_update_payload())
+
+        return sum(refreshed)
+
+    async def _resolve(self, service: KaraokeService, due: list[tuple[Room, KaraokeQueueItem]]) -> list[Optional[str]]:
+        room = due[0][0]
+        first = room.queue.items[0] if room.queue.items else None
+        priority = ExtractionPriority.NEXT_UP if any(item is first for _, item in due) else ExtractionPriority.PREFETCH
+        stale_urls = [item.entry.video_url for _, item in due]
+        entries = [item.entry.model_copy(update={"video_url": None}) for _, item in due]
+        try:
+            # Without the URL in hand the service goes to the cache first, which
+            # already holds a newer one if another room refreshed this song.
+            responses = await service.get_video_urls(entries, priority=priority, room_id=room.id)
+            urls = [response.video_url for response in responses]
+
+            # The cache can also hand back the stale URL itself: it keeps one
+            # until the provider's expiry margin, and a lead time reaching past
+            # that margin asks sooner. Those are resolved again past the cache.
+            again = [index for index, url in enumerate(urls) if url and url == stale_urls[index]]
+            if again and service.cache:
+                for index in again:
+                    service.cache.invalidate_video_url(entries[index].id, entries[index].source)
+                retried = await service.get_video_urls(
+                    [entries[index] for index in again], priority=priority, room_id=room.id
+                )
+                for index, response in zip(again, retried):
+                    urls[index] = response.video_url
+        except Exception as e:
+            print(f"[REFRESH] ✗ Failed to refresh URLs for room {room.id}: {e}")
+            return [None] * len(due)
+        return urls
+
+    def _apply(self, item: KaraokeQueueItem, stale_url: str, video_url: Optional[str]) -> bool:
+        if not video_url or video_url == stale_url:
+            self.stats["failed"] += 1
+            return False
+
+        # Replaced only if nothing else changed it while the refresh ran.
+        if item.entry.video_url != stale_url:
+            return False
+
+        item.entry.video_url = video_url
+        self.stats["refreshed"] += 1
+        print(f"[REFRESH] ✓ Refreshed URL for: {item.entry.title}")
+        return True
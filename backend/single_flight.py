@@ -0,0 +1,75 @@
+"""
+Coalescing of concurrent work on the same key.
+
+A room searches together and queues the same songs, so the same search or the
+same extraction is often asked for several times before the first one returns.
+Each of those is a yt-dlp call measured in seconds. Callers that arrive while
+one is running wait on it instead of starting their own.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    One task per key, shared by every caller that asks while it runs.
+
+    A caller that is cancelled only stops waiting; the work carries on for the
+    others, and is cancelled itself once nobody is left waiting on it. The key
+    is released as soon as the task finishes, however it finishes, so a
+    failure is never handed to a caller that arrives afterwards.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._waiters: dict[str, int] = {}
+        self.started = 0
+        self.joined = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def run(self, key: str, work: Callable[[], Awaitable[T]]) -> T:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(work())
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.started += 1
+        else:
+            self.joined += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            # Still this key's task unless it finished and something new took
+            # its place, in which case the count is no longer ours to touch.
+            if self._tasks.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not task.done():
+                    task.cancel()
+
+    def _release(self, key: str, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            del self._waiters[key]
+        # Read the outcome so a failure nobody waited for is not reported as
+        # never retrieved; the callers that did wait already raised it.
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "started": self.started,
+            "joined": self.joined,
+        }
@@ -35,6 +35,13 @@ class ProviderRegistry:
     def get(self, provider_id: str) -> Optional[KaraokeSourceProvider]:
         return self._by_id.get(provider_id)
 
+    async def start(self):
+        for provider in self._by_id.values():
+            try:
+                await provider.start()
+            except Exception as e:
+                print(f"[SOURCES] Failed to start {provider.provider_id}: {e}")
+
     async def close(self):
         for provider in self._by_id.values():
             try:
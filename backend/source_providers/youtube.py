@@ -2,13 +2,20 @@ import asyncio
 import json
 import os
 import random
+import re
 import shlex
+import sys
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import NamedTuple, Optional
-from urllib.parse import urlparse, urlunparse
+from urllib.parse import parse_qs, urlparse, urlunparse
 
 import yt_dlp
 
+from source_providers.ytdlp_update import YtdlpInstall, YtdlpUpdater
 from core.ranking import KARAOKE_QUERY_KEYWORDS, enhance_query_with_keywords
 from core.search import (
     KaraokeSourceProvider,
@@ -23,8 +30,8 @@ from config import config
 PLAYER_CLIENT = "android_sdkless"
 FORMAT_SELECTOR = "best[ext=mp4]/best[ext=webm]/best"
 
-# Sixty results cost about half a second more than thirty, and they are what
-# the ranking, and the pages after the first, have to work with.
+# The most one search asks for, however deep the service wants to go. Each
+# results page YouTube returns holds about twenty, and each is a round trip.
 SEARCH_FETCH_LIMIT = 60
 
 SEARCH_SOCKET_TIMEOUT_SECONDS = 15
@@ -48,8 +55,59 @@ RETRYABLE_ERROR_MARKERS = (
 
 KILL_GRACE_SECONDS = 5.0
 
+# Most watch URLs one yt-dlp run takes, and how much the hard timeout grows
+# for each past the first. A run that hangs holds every URL in it.
+EXTRACT_BATCH_MAX = 5
+EXTRACT_BATCH_SECONDS_PER_URL = 15.0
+
+# Applied to every extraction, single or batched. yt-dlp's internal retries
+# are kept low so the wrapper's timeout, not yt-dlp, decides when to give up.
+EXTRACT_ARGS = [
+    "--format", FORMAT_SELECTOR,
+    "--socket-timeout", "15",
+    "--retries", "1",
+    "--extractor-args", f"youtube:player_client={PLAYER_CLIENT}",
+]
+
+# A hedge asks through another player client, so it is not stuck behind
+# whatever is stalling the first attempt's.
+HEDGE_PLAYER_CLIENT = "tv"
+HEDGE_EXTRACT_ARGS = [
+    *EXTRACT_ARGS[:-1],
+    f"youtube:player_client={HEDGE_PLAYER_CLIENT}",
+]
+
+# An attempt still running at this percentile of recent extraction times is
+# hedged. Nine in ten have answered by then, so the wait is likely a stall.
+HEDGE_LATENCY_PERCENTILE = 0.9
+
+# What an extraction reads from the info dict, printed by yt-dlp in place of
+# the full dump. The dump lists every format, thumbnail and caption track and
+# runs to hundreds of kilobytes a video; these are a few hundred bytes.
+LEAN_FIELDS = ("id", "url", "ext", "format_id", "protocol", "width", "height")
+LEAN_TEMPLATE = "%(.{" + ",".join(LEAN_FIELDS) + "})j"
+
+# How the CLI reports one URL of several failing: "ERROR: [youtube] <id>: ..."
+CLI_VIDEO_ERROR = re.compile(r"^ERROR: \[[^\]]+\] ([\w-]+): (.*)$", re.MULTILINE)
+
+# Signed stream URLs carry their own expiry. The cached copy is dropped this
+# long before it, so a URL handed out is still good for a whole song after
+# sitting in the queue.
+STREAM_URL_EXPIRY_MARGIN_SECONDS = 30 * 60
+
+# For a URL that does not say when it expires.
+STREAM_URL_DEFAULT_TTL_SECONDS = 4 * 3600
+
 # How long a failed probe is trusted before /health tries again.
 PROBE_INTERVAL_SECONDS = 60.0
+# Under the container's 10s healthcheck, waiting for a worker included.
+PROBE_TIMEOUT_SECONDS = 8.0
+
+WORKER_SCRIPT = Path(__file__).with_name("ytdlp_worker.py")
+
+# A full extraction's info is one line of JSON, and runs to hundreds of
+# kilobytes with every format listed.
+WORKER_LINE_LIMIT = 32 * 1024 * 1024
 
 
 class YtdlpError(Exception):
@@ -117,6 +175,88 @@ class YtdlpHealth(ProviderHealth):
         return self.snapshot()
 
 
+class YtdlpCacheDir:
+    """
+    Where yt-dlp keeps what it learns about YouTube's player: the signature
+    and n-parameter functions it solves by running the player's JavaScript
+    through the runtime, keyed by player version. With the directory cold,
+    the first extraction after a start downloads the player and solves it on
+    the critical path of a song; warm, the solution is read back from disk.
+
+    Owned here rather than left at yt-dlp's default under $HOME, which a
+    container loses on every restart. The provider warms it at startup by
+    extracting one known video in the background.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.warmup: dict = {"state": "pending", "seconds": None, "finished_at": None, "error": None}
+
+    def ensure(self):
+        try:
+            os.makedirs(self.path, exist_ok=True)
+        except OSError as e:
+            print(f"[YTDLP] Cannot create cache directory {self.path}: {e}")
+
+    def snapshot(self) -> dict:
+        """What is in the directory and how old its newest entry is, per section."""
+        now = time.time()
+        files = size = 0
+        newest: Optional[float] = None
+        sections: dict[str, dict] = {}
+        for root, _, names in os.walk(self.path):
+            relative = os.path.relpath(root, self.path)
+            section = None if relative == "." else sections.setdefault(
+                relative.split(os.sep)[0], {"files": 0, "newest": None}
+            )
+            for name in names:
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                files += 1
+                size += stat.st_size
+                newest = max(newest or 0.0, stat.st_mtime)
+                if section is not None:
+                    section["files"] += 1
+                    section["newest"] = max(section["newest"] or 0.0, stat.st_mtime)
+
+        def age(mtime: Optional[float]) -> Optional[int]:
+            return round(now - mtime) if mtime else None
+
+        return {
+            "path": self.path,
+            "files": files,
+            "bytes": size,
+            "newest_age_seconds": age(newest),
+            "sections": {
+                name: {"files": section["files"], "newest_age_seconds": age(section["newest"])}
+                for name, section in sorted(sections.items())
+            },
+            "warmup": dict(self.warmup),
+        }
+
+
+def ytdlp_cache_dir() -> str:
+    if config.YTDLP_CACHE_DIR:
+        return config.YTDLP_CACHE_DIR
+    if config.CACHE_DIR:
+        return os.path.join(config.CACHE_DIR, "yt-dlp")
+    # A fixed name, so at least a restart of the process finds it again.
+    return os.path.join(tempfile.gettempdir(), "karaoke-yt-dlp")
+
+
+YTDLP_CACHE = YtdlpCacheDir(ytdlp_cache_dir())
+
+
+def _runtime_args() -> list[str]:
+    """Where yt-dlp keeps solved player code, and what it solves it with."""
+    args = ["--cache-dir", YTDLP_CACHE.path]
+    if config.YTDLP_RUNTIME:
+        args.extend(["--js-runtimes", config.YTDLP_RUNTIME])
+    return args
+
+
 def proxy_url() -> Optional[str]:
     """Build the configured proxy URL, with credentials when both are set."""
     if not config.PROXY_SERVER:
@@ -158,7 +298,7 @@ async def _terminate(proc: asyncio.subprocess.Process):
         print(f"[YTDLP] Process {proc.pid} did not exit after kill")
 
 
-async def run_ytdlp(args: list[str], timeout: Optional[float] = None) -> str:
+async def run_ytdlp(args: list[str], timeout: Optional[float] = None, install: Optional[YtdlpInstall] = None) -> str:
     """
     Run the yt-dlp CLI and return its stdout, raising YtdlpError on any failure.
 
@@ -167,7 +307,21 @@ async def run_ytdlp(args: list[str], timeout: Optional[float] = None) -> str:
     often. It also allows the hard timeout below, which the in-process API has
     no equivalent for, and keeps extractor crashes out of the server.
     """
-    argv = [config.YTDLP_BINARY, *YTDLP_BASE_ARGS]
+    returncode, stdout, stderr = await _exec_ytdlp(args, timeout, install)
+    if returncode != 0:
+        raise YtdlpError(f"yt-dlp exited with code {returncode}", returncode=returncode, stderr=stderr.strip())
+    return stdout
+
+
+async def _exec_ytdlp(
+    args: list[str], timeout: Optional[float] = None, install: Optional[YtdlpInstall] = None
+) -> tuple[int, str, str]:
+    """
+    Run the CLI and return its exit code and output, raising only when it never
+    finished. Runs the active install unless given another.
+    """
+    install = install or YTDLP_UPDATER.active
+    argv = [*install.argv(config.YTDLP_BINARY), *YTDLP_BASE_ARGS, *_runtime_args()]
     if config.YTDLP_EXTRA_ARGS:
         argv.extend(shlex.split(config.YTDLP_EXTRA_ARGS))
     argv.extend(args)
@@ -179,7 +333,7 @@ async def run_ytdlp(args: list[str], timeout: Optional[float] = None) -> str:
             *argv,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
-            env=_subprocess_env(),
+            env=install.apply(_subprocess_env()),
         )
     except FileNotFoundError as e:
         raise YtdlpMissing(f"yt-dlp binary not found at {config.YTDLP_BINARY!r}") from e
@@ -195,30 +349,470 @@ async def run_ytdlp(args: list[str], timeout: Optional[float] = None) -> str:
         await _terminate(proc)
         raise
 
-    if proc.returncode != 0:
-        raise YtdlpError(
-            f"yt-dlp exited with code {proc.returncode}",
-            returncode=proc.returncode,
-            stderr=stderr.decode("utf-8", errors="replace").strip(),
+    return (
+        proc.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+class OutputStats:
+    """
+    What extraction output costs to take in, per mode: bytes read from yt-dlp
+    and time spent parsing them, per URL. Fallbacks count lean outputs that
+    carried no stream URL and were extracted again in full.
+    """
+
+    def __init__(self):
+        self._modes: dict[str, dict] = {}
+        self.fallbacks = 0
+
+    def record(self, mode: str, size: int, seconds: float, urls: int = 1):
+        stats = self._modes.setdefault(mode, {"urls": 0, "bytes": 0, "parse_seconds": 0.0})
+        stats["urls"] += urls
+        stats["bytes"] += size
+        stats["parse_seconds"] += seconds
+
+    def snapshot(self) -> dict:
+        modes = {
+            mode: {
+                "urls": stats["urls"],
+                "average_bytes": stats["bytes"] // stats["urls"],
+                "average_parse_ms": round(stats["parse_seconds"] / stats["urls"] * 1000, 3),
+            }
+            for mode, stats in self._modes.items()
+            if stats["urls"]
+        }
+        return {**modes, "fallbacks": self.fallbacks}
+
+
+OUTPUT_STATS = OutputStats()
+
+
+class YtdlpWorker:
+    def __init__(self, proc: asyncio.subprocess.Process, generation: int):
+        self.proc = proc
+        self.jobs = 0
+        # The pool's generation when it started; an older one runs a yt-dlp
+        # that has since been replaced.
+        self.generation = generation
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+
+class YtdlpWorkerPool:
+    """
+    Long lived extraction processes, each importing yt-dlp once.
+
+    Keeps what the CLI wrapper was chosen for: an extraction runs in its own
+    process, so a crash costs one job, and a job past its timeout has its
+    worker killed, which is the only way to stop a hung extraction. A worker
+    is replaced after max_jobs jobs, so whatever yt-dlp accumulates between
+    extractions does not build up, and after a crash or a kill.
+
+    Each slot holds an idle worker, a worker being started, or nothing yet;
+    workers start on first use and their replacements start in the background
+    as soon as the old one goes, so the next job does not pay for them.
+
+    recycle() replaces every worker after a yt-dlp update: an idle one when it
+    is next taken, a busy one once its job is done.
+    """
+
+    def __init__(self, size: int, max_jobs: int):
+        self.size = max(0, size)
+        self.max_jobs = max(1, max_jobs)
+        self._slots: Optional[asyncio.Queue] = None
+        self._procs: set[asyncio.subprocess.Process] = set()
+        self._background: set[asyncio.Task] = set()
+        self._next_job_id = 0
+        self.generation = 0
+        self.closed = False
+        self.stats = {"started": 0, "jobs": 0, "recycled": 0, "crashed": 0, "killed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def _queue(self) -> asyncio.Queue:
+        # Created on first use, inside the running loop.
+        if self._slots is None:
+            self._slots = asyncio.Queue()
+            for _ in range(self.size):
+                self._slots.put_nowait(None)
+        return self._slots
+
+    def _in_background(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def recycle(self):
+        self.generation += 1
+
+    def has_idle_worker(self) -> bool:
+        """Whether a job started now gets a worker without waiting for one."""
+        return self._queue().qsize() > 0
+
+    async def _spawn(self) -> YtdlpWorker:
+        generation = self.generation
+        install = YTDLP_UPDATER.active
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, str(WORKER_SCRIPT),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                env=install.apply(_subprocess_env()),
+                limit=WORKER_LINE_LIMIT,
+            )
+        except OSError as e:
+            raise YtdlpError(f"Failed to start a yt-dlp worker: {e}") from e
+
+        self._procs.add(proc)
+        self.stats["started"] += 1
+        return YtdlpWorker(proc, generation)
+
+    async def _started(self, task: asyncio.Task) -> YtdlpWorker:
+        """
+        Wait on a worker being started. Shielded, so a job that gives up
+        waiting leaves it under way for the next job rather than half made.
+        """
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self.closed and task.cancelled():
+                raise YtdlpError("yt-dlp worker pool is closed") from None
+            raise
+
+    async def _acquire(self) -> YtdlpWorker:
+        slot = await self._queue().get()
+        try:
+            if self.closed:
+                raise YtdlpError("yt-dlp worker pool is closed")
+            if isinstance(slot, asyncio.Task):
+                try:
+                    slot = await self._started(slot)
+                except YtdlpError:
+                    if self.closed:
+                        raise
+                    slot = None
+            if isinstance(slot, YtdlpWorker) and slot.alive and slot.generation != self.generation:
+                self._in_background(self._retire(slot, kill=False))
+                slot = None
+            if slot is None or not slot.alive:
+                slot = self._in_background(self._spawn())
+                slot = await self._started(slot)
+            return slot
+        except BaseException:
+            self._slots.put_nowait(slot if isinstance(slot, asyncio.Task) else None)
+            raise
+
+    async def _retire(self, worker: YtdlpWorker, kill: bool):
+        """Let a worker finish on its own, or kill it; either way it is gone."""
+        proc = worker.proc
+        try:
+            if not kill and proc.returncode is None:
+                proc.stdin.close()
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout=KILL_GRACE_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            await _terminate(proc)
+        finally:
+            self._procs.discard(proc)
+
+    async def request(
+        self, job: dict, timeout: Optional[float] = None, mode: Optional[str] = None, urls: int = 1
+    ) -> dict:
+        limit = timeout if timeout is not None else config.YTDLP_TIMEOUT_SECONDS
+        if self.closed:
+            raise YtdlpError("yt-dlp worker pool is closed")
+        # The limit covers waiting for a worker too, or a caller with a short
+        # one, such as the health probe, waits out every busy extraction.
+        started = time.monotonic()
+        try:
+            worker = await asyncio.wait_for(self._acquire(), timeout=limit)
+        except asyncio.TimeoutError:
+            raise YtdlpTimeout(f"No yt-dlp worker was free within {limit:g}s")
+        remaining = max(limit - (time.monotonic() - started), 0.0)
+        answered = keep = False
+        try:
+            self._next_job_id += 1
+            job_id = self._next_job_id
+            worker.proc.stdin.write(json.dumps({"id": job_id, **job}).encode() + b"\n")
+            await worker.proc.stdin.drain()
+
+            line = await asyncio.wait_for(worker.proc.stdout.readline(), timeout=remaining)
+            if not line:
+                returncode = await worker.proc.wait()
+                self.stats["crashed"] += 1
+                raise YtdlpError(f"yt-dlp worker exited with code {returncode}")
+
+            started = time.perf_counter()
+            reply = json.loads(line)
+            if mode:
+                OUTPUT_STATS.record(mode, len(line), time.perf_counter() - started, urls)
+            if reply.get("id") != job_id:
+                raise YtdlpError(f"yt-dlp worker answered job {reply.get('id')} for job {job_id}")
+
+            answered = True
+            worker.jobs += 1
+            self.stats["jobs"] += 1
+            keep = worker.jobs < self.max_jobs
+            if not keep:
+                self.stats["recycled"] += 1
+            elif worker.generation != self.generation:
+                # Runs a yt-dlp an update replaced. Clean, so it exits on its own.
+                keep = False
+            return reply
+
+        except asyncio.TimeoutError:
+            self.stats["killed"] += 1
+            raise YtdlpTimeout(f"yt-dlp timed out after {limit:g}s")
+        except (BrokenPipeError, ConnectionResetError) as e:
+            self.stats["crashed"] += 1
+            raise YtdlpError(f"yt-dlp worker went away: {e}") from e
+        except (json.JSONDecodeError, ValueError) as e:
+            raise YtdlpError(f"yt-dlp worker sent a reply that is not valid JSON: {e}") from e
+
+        finally:
+            if self.closed:
+                # close() has stopped every process, this one's included.
+                pass
+            elif keep:
+                self._slots.put_nowait(worker)
+            else:
+                # Anything but a clean reply leaves the worker in an unknown
+                # state, mid job at worst, so it is not reused.
+                self._in_background(self._retire(worker, kill=not answered))
+                self._slots.put_nowait(self._in_background(self._spawn()))
+
+    @staticmethod
+    def _argv(args: list[str], mode: str = "full") -> list[str]:
+        argv = [*YTDLP_BASE_ARGS, *_runtime_args()]
+        if mode == "lean":
+            # The worker fills the template itself rather than print it.
+            argv.extend(["--print", LEAN_TEMPLATE])
+        if config.YTDLP_EXTRA_ARGS:
+            argv.extend(shlex.split(config.YTDLP_EXTRA_ARGS))
+        argv.extend(args)
+        return argv
+
+    @staticmethod
+    def _result(reply: dict) -> dict:
+        if not reply.get("ok"):
+            # Exit code 1 is what the CLI gives for the same failure, so the
+            # two paths classify errors alike.
+            raise YtdlpError("yt-dlp exited with code 1", returncode=1, stderr=reply.get("error") or "")
+        return reply["info"]
+
+    async def extract(self, args: list[str], timeout: Optional[float] = None, mode: str = "full") -> dict:
+        return self._result(await self.request({"args": self._argv(args, mode)}, timeout=timeout, mode=mode))
+
+    async def extract_many(
+        self, args: list[str], urls: list[str], timeout: Optional[float] = None, mode: str = "full"
+    ) -> list[dict | YtdlpError]:
+        """One job for several URLs: an info dict or the error, per URL, in order."""
+        reply = await self.request(
+            {"args": self._argv([*args, *urls], mode), "batch": True}, timeout=timeout, mode=mode, urls=len(urls)
         )
+        results = reply.get("results")
+        if not reply.get("ok") or not isinstance(results, list) or len(results) != len(urls):
+            raise YtdlpError(f"yt-dlp worker failed the batch: {reply.get('error')}")
+
+        outcomes: list[dict | YtdlpError] = []
+        for result in results:
+            try:
+                outcomes.append(self._result(result))
+            except YtdlpError as e:
+                outcomes.append(e)
+        return outcomes
+
+    async def version(self, timeout: Optional[float] = None) -> str:
+        reply = await self.request({"version": True}, timeout=timeout)
+        return reply["version"]
+
+    async def close(self):
+        self.closed = True
+        for task in list(self._background):
+            task.cancel()
+        for proc in list(self._procs):
+            await _terminate(proc)
+        self._procs.clear()
+
+
+# Shared by every extraction in the process. Empty until the first job.
+WORKER_POOL = YtdlpWorkerPool(config.YTDLP_WORKERS, config.YTDLP_WORKER_MAX_JOBS)
+
+
+class HedgeBudget:
+    """
+    How many hedged attempts may run at once, across every extraction in the
+    process. A hedge is a second request upstream for the same video; without
+    a cap, an upstream slowing down for everyone would be sent twice the load
+    at the worst moment.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(0, limit)
+        self.in_flight = 0
+        self.stats = {"hedged": 0, "hedge_won": 0, "first_won": 0, "skipped_at_cap": 0, "skipped_no_worker": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.limit > 0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= self.limit:
+            self.stats["skipped_at_cap"] += 1
+            return False
+        self.in_flight += 1
+        self.stats["hedged"] += 1
+        return True
 
-    return stdout.decode("utf-8", errors="replace")
+    def release(self):
+        self.in_flight -= 1
 
+    def snapshot(self) -> dict:
+        return {"limit": self.limit, "in_flight": self.in_flight, **self.stats}
 
-async def ytdlp_json(args: list[str], timeout: Optional[float] = None) -> dict:
-    """Run yt-dlp in simulate mode and return the parsed info dictionary."""
-    stdout = await run_ytdlp(["--dump-single-json", "--skip-download", *args], timeout=timeout)
 
+HEDGES = HedgeBudget(config.EXTRACT_HEDGE_MAX)
+
+
+def _dump_args(mode: str, many: bool = False) -> list[str]:
+    if mode == "lean":
+        return ["--print", LEAN_TEMPLATE]
+    return ["--dump-json" if many else "--dump-single-json"]
+
+
+async def ytdlp_json(args: list[str], timeout: Optional[float] = None, lean: bool = False) -> dict:
+    """
+    Run yt-dlp in simulate mode and return the parsed info dictionary.
+
+    Lean, only LEAN_FIELDS of it are printed and parsed. A lean output with no
+    stream URL in it is extracted again in full.
+    """
+    if lean:
+        info = await _ytdlp_info(args, timeout, "lean")
+        if select_stream_url(info):
+            return info
+        OUTPUT_STATS.fallbacks += 1
+        print("[YTDLP] Lean output carried no stream URL, extracting in full")
+    return await _ytdlp_info(args, timeout, "full")
+
+
+async def _ytdlp_info(args: list[str], timeout: Optional[float], mode: str) -> dict:
+    if WORKER_POOL.enabled:
+        return await WORKER_POOL.extract(args, timeout=timeout, mode=mode)
+
+    stdout = await run_ytdlp([*_dump_args(mode), "--skip-download", *args], timeout=timeout)
+
+    started = time.perf_counter()
     try:
-        return json.loads(stdout)
+        info = json.loads(stdout)
     except json.JSONDecodeError as e:
         raise YtdlpError(f"yt-dlp returned output that is not valid JSON: {e}") from e
+    OUTPUT_STATS.record(mode, len(stdout.encode()), time.perf_counter() - started)
+    return info
 
 
-async def ytdlp_version(timeout: float = 15.0) -> str:
+async def ytdlp_json_many(
+    args: list[str], video_ids: list[str], timeout: Optional[float] = None, lean: bool = False
+) -> list[dict | YtdlpError]:
+    """
+    Extract several videos in one run: an info dict or the error, per ID, in
+    order. Raises only when the run as a whole failed. Lean as for ytdlp_json,
+    with the videos whose output fell short extracted again in one full run.
+    """
+    outcomes = await _ytdlp_infos(args, video_ids, timeout, "lean" if lean else "full")
+    if not lean:
+        return outcomes
+
+    short = [
+        index for index, outcome in enumerate(outcomes)
+        if not isinstance(outcome, YtdlpError) and not select_stream_url(outcome)
+    ]
+    if short:
+        OUTPUT_STATS.fallbacks += len(short)
+        print(f"[YTDLP] Lean output carried no stream URL for {len(short)} videos, extracting in full")
+        retried = await _ytdlp_infos(args, [video_ids[index] for index in short], timeout, "full")
+        for index, outcome in zip(short, retried):
+            outcomes[index] = outcome
+    return outcomes
+
+
+async def _ytdlp_infos(
+    args: list[str], video_ids: list[str], timeout: Optional[float], mode: str
+) -> list[dict | YtdlpError]:
+    urls = [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
+    if WORKER_POOL.enabled:
+        return await WORKER_POOL.extract_many(args, urls, timeout=timeout, mode=mode)
+
+    # One JSON line per video that resolved. The rest are reported on stderr,
+    # by ID, and the run exits non-zero once any of them failed.
+    returncode, stdout, stderr = await _exec_ytdlp(
+        [*_dump_args(mode, many=True), "--skip-download", "--no-abort-on-error", *args, *urls], timeout=timeout
+    )
+
+    started = time.perf_counter()
+    infos: dict[str, dict] = {}
+    for line in stdout.splitlines():
+        try:
+            info = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(info, dict) and info.get("id"):
+            infos[info["id"]] = info
+    OUTPUT_STATS.record(mode, len(stdout.encode()), time.perf_counter() - started, len(video_ids))
+
+    errors = {video_id: message for video_id, message in CLI_VIDEO_ERROR.findall(stderr)}
+
+    outcomes: list[dict | YtdlpError] = []
+    for video_id in video_ids:
+        if video_id in infos:
+            outcomes.append(infos[video_id])
+        elif video_id in errors:
+            outcomes.append(YtdlpError(f"yt-dlp exited with code {returncode}", returncode=returncode,
+                                       stderr=f"ERROR: {errors[video_id]}"))
+        else:
+            # Neither resolved nor blamed: the run broke off before reaching it.
+            outcomes.append(YtdlpError(f"yt-dlp exited with code {returncode} before extracting {video_id}",
+                                       stderr=stderr.strip()))
+    return outcomes
+
+
+async def ytdlp_version(timeout: float = PROBE_TIMEOUT_SECONDS) -> str:
+    if WORKER_POOL.enabled:
+        return await WORKER_POOL.version(timeout=timeout)
     return (await run_ytdlp(["--version"], timeout=timeout)).strip()
 
 
+async def validate_install(install: YtdlpInstall) -> str:
+    """
+    Run an install the updater has not switched to yet, through the CLI and
+    on its own: its version, once it has resolved a stream URL for the canary.
+    """
+    version = (await run_ytdlp(["--version"], timeout=15.0, install=install)).strip()
+    if not config.YTDLP_CANARY_VIDEO_ID:
+        return version
+
+    url = f"https://www.youtube.com/watch?v={config.YTDLP_CANARY_VIDEO_ID}"
+    stdout = await run_ytdlp([*_dump_args("lean"), "--skip-download", *EXTRACT_ARGS, url], install=install)
+    try:
+        info = json.loads(stdout)
+    except json.JSONDecodeError as e:
+        raise YtdlpError(f"yt-dlp {version} printed output that is not valid JSON: {e}") from e
+    if not select_stream_url(info):
+        raise YtdlpError(f"yt-dlp {version} extracted no stream URL for the canary")
+    return version
+
+
+YTDLP_UPDATER = YtdlpUpdater(yt_dlp.version.__version__, validate_install)
+
+
 def select_stream_url(info: dict) -> Optional[str]:
     """
     requested_downloads reflects the selected format, so prefer it and fall back
@@ -234,6 +828,23 @@ def select_stream_url(info: dict) -> Optional[str]:
     return info.get("url")
 
 
+def stream_url_expires_at(url: str) -> Optional[float]:
+    """
+    The expiry a googlevideo URL is signed with. Progressive URLs carry it as
+    an `expire` query parameter, manifest URLs as an `/expire/<ts>/` segment.
+    """
+    try:
+        parsed = urlparse(url)
+        values = parse_qs(parsed.query).get("expire")
+        if not values:
+            segments = parsed.path.split("/")
+            if "expire" in segments[:-1]:
+                values = [segments[segments.index("expire") + 1]]
+        return float(values[0]) if values else None
+    except (ValueError, IndexError):
+        return None
+
+
 def channel_name(info: dict) -> str:
     return info.get("channel") or info.get("uploader") or ""
 
@@ -242,7 +853,86 @@ def is_live(info: dict) -> bool:
     return info.get("live_status") in ("is_live", "is_upcoming", "post_live")
 
 
+class SearchClients:
+    """
+    One YoutubeDL per search thread, kept between searches.
+
+    Building one loads the extractor registry and sets up the HTTP handlers
+    and cookie jar, and closing it drops its connections; per search, that is
+    paid on every keystroke. YoutubeDL is not thread safe, so each thread owns
+    its own and no lock is held while one searches.
+
+    A client is rebuilt after max_uses searches or max_age_seconds, so state it
+    accumulates (cookies, cached player data) does not live forever; when the
+    options it was built with change, as when the proxy settings do; after a
+    search on it raised; and after reset().
+    """
+
+    def __init__(self, max_uses: int, max_age_seconds: float):
+        self.max_uses = max(1, max_uses)
+        self.max_age_seconds = max_age_seconds
+        self._local = threading.local()
+        # Bumped by reset(). Each thread compares and rebuilds its own client,
+        # since closing a YoutubeDL from another thread is not safe.
+        self._generation = 0
+        self.stats = {"created": 0, "reused": 0, "recycled": 0, "discarded": 0}
+
+    def search(self, opts: dict, query: str) -> Optional[dict]:
+        ydl = self._client(opts)
+        try:
+            return ydl.extract_info(query, download=False)
+        except BaseException:
+            self._discard()
+            self.stats["discarded"] += 1
+            raise
+
+    def reset(self):
+        self._generation += 1
+
+    def _client(self, opts: dict) -> "yt_dlp.YoutubeDL":
+        fingerprint = json.dumps(opts, sort_keys=True, default=str)
+        held = getattr(self._local, "held", None)
+        if held is not None:
+            ydl, held_fingerprint, generation, created_at, uses = held
+            if (
+                held_fingerprint == fingerprint
+                and generation == self._generation
+                and uses < self.max_uses
+                and time.monotonic() - created_at < self.max_age_seconds
+            ):
+                self._local.held = (ydl, held_fingerprint, generation, created_at, uses + 1)
+                self.stats["reused"] += 1
+                return ydl
+            self._discard()
+            self.stats["recycled"] += 1
+
+        ydl = yt_dlp.YoutubeDL(opts)
+        self._local.held = (ydl, fingerprint, self._generation, time.monotonic(), 1)
+        self.stats["created"] += 1
+        return ydl
+
+    def _discard(self):
+        held = getattr(self._local, "held", None)
+        self._local.held = None
+        if held is not None:
+            try:
+                held[0].close()
+            except Exception as e:
+                print(f"[YTDLP] Failed to close search client: {e}")
+
+
+# Searches get their own threads, and only SEARCH_THREADS of them, so the
+# clients kept per thread are bounded too, and a burst of searches cannot take
+# the default executor's threads from the rest of the server.
+SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=max(1, config.SEARCH_THREADS), thread_name_prefix="search")
+SEARCH_CLIENTS = SearchClients(config.SEARCH_CLIENT_MAX_USES, config.SEARCH_CLIENT_MAX_AGE_SECONDS)
+
+
 class YTKaraokeSourceProvider(KaraokeSourceProvider):
+    search_timeout_bounds = (3.0, config.SEARCH_TIMEOUT_SECONDS)
+    # A cold worker imports yt-dlp before its first answer, hence the floor.
+    extract_timeout_bounds = (10.0, config.YTDLP_TIMEOUT_SECONDS)
+
     def __init__(self, allowed_channels: list[str] = None, karaoke_keywords: list[str] = None):
         super().__init__()
         self.health = YtdlpHealth()
@@ -251,13 +941,74 @@ class YTKaraokeSourceProvider(KaraokeSourceProvider):
         # The first is what gets appended to a query that carries none of them;
         # the rest are only ever recognised.
         self.karaoke_keywords = karaoke_keywords or list(KARAOKE_QUERY_KEYWORDS)
+        self._warmup: Optional[asyncio.Task] = None
+        self._update: Optional[asyncio.Task] = None
 
     @property
     def provider_id(self) -> str:
         return "youtube"
 
     async def check_health(self) -> dict:
-        return await self.health.probe()
+        return {
+            **await self.health.probe(),
+            "workers": dict(WORKER_POOL.stats),
+            "search_clients": dict(SEARCH_CLIENTS.stats),
+            "hedges": HEDGES.snapshot(),
+            "output": OUTPUT_STATS.snapshot(),
+            # A walk of the directory, kept off the event loop.
+            "cache_dir": await asyncio.to_thread(YTDLP_CACHE.snapshot),
+            "update": YTDLP_UPDATER.snapshot(),
+        }
+
+    async def start(self):
+        YTDLP_CACHE.ensure()
+        if config.YTDLP_CANARY_VIDEO_ID and self._warmup is None:
+            self._warmup = asyncio.create_task(self._warm_cache(config.YTDLP_CANARY_VIDEO_ID))
+        if config.YTDLP_AUTO_UPDATE and self._update is None:
+            self._update = asyncio.create_task(self._update_ytdlp())
+
+    async def _update_ytdlp(self):
+        """Switch extractions to the latest release, once it has proven itself."""
+        if await YTDLP_UPDATER.update():
+            WORKER_POOL.recycle()
+            self.health.record_ok(version=YTDLP_UPDATER.active.version)
+
+    async def _warm_cache(self, video_id: str):
+        """
+        Extract one known video, so the player is solved and on disk before
+        the first song needs it. Left off the breaker: a cold extraction's time
+        is not a sample of what extractions take.
+        """
+        YTDLP_CACHE.warmup["state"] = "running"
+        started = time.monotonic()
+        try:
+            info = await ytdlp_json([*EXTRACT_ARGS, f"https://www.youtube.com/watch?v={video_id}"], lean=True)
+            error = None if select_stream_url(info) else "No stream URL extracted"
+        except YtdlpError as e:
+            error = e.details
+        except Exception as e:
+            # Anything else would leave /health reporting it running for good.
+            error = str(e) or type(e).__name__
+
+        seconds = time.monotonic() - started
+        YTDLP_CACHE.warmup.update(
+            state="failed" if error else "done",
+            seconds=round(seconds, 2),
+            finished_at=time.time(),
+            error=error,
+        )
+        if error:
+            print(f"[YTDLP] Cache warmup with {video_id} failed after {seconds:.1f}s: {error}")
+        else:
+            self.health.record_ok()
+            print(f"[YTDLP] Cache warmed with {video_id} in {seconds:.1f}s")
+
+    async def close(self):
+        for task in (self._warmup, self._update):
+            if task is not None:
+                task.cancel()
+        await WORKER_POOL.close()
+        SEARCH_CLIENTS.reset()
 
     @staticmethod
     def _thumbnail_url(video_id: str) -> Optional[str]:
@@ -281,6 +1032,7 @@ class YTKaraokeSourceProvider(KaraokeSourceProvider):
             'extract_flat': True,
             'noplaylist': True,
             'socket_timeout': SEARCH_SOCKET_TIMEOUT_SECONDS,
+            'cachedir': YTDLP_CACHE.path,
             'extractor_args': {
                 'youtube': {
                     'player_client': [PLAYER_CLIENT]
@@ -294,55 +1046,55 @@ class YTKaraokeSourceProvider(KaraokeSourceProvider):
 
         return opts
 
-    def _search_videos(self, query: str) -> list[SearchCandidate]:
-        ydl_opts = self._get_ydl_opts()
+    def _search_videos(self, query: str, depth: int) -> list[SearchCandidate]:
         candidates: list[SearchCandidate] = []
         seen: set[str] = set()
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            search_query = f"ytsearch{SEARCH_FETCH_LIMIT}:{self._enhance_query(query)}"
-            search_results = ydl.extract_info(search_query, download=False)
-
-            if not search_results or 'entries' not in search_results:
-                return []
-
-            for position, video_info in enumerate(search_results['entries']):
-                if not video_info:
-                    continue
-
-                video_id = video_info.get('id', '')
-                if not video_id or video_id in seen:
-                    continue
-
-                if is_live(video_info):
-                    continue
-
-                uploader = channel_name(video_info)
-                if self.allowed_channels and not self._is_allowed_channel(uploader):
-                    continue
-
-                seen.add(video_id)
-                candidates.append(SearchCandidate(
-                    entry=KaraokeEntry(
-                        id=video_id,
-                        title=video_info.get('title', 'Unknown Title'),
-                        artist=uploader,
-                        video_url=None,  # Loaded on demand
-                        source=self.provider_id,
-                        uploader=uploader,
-                        duration=video_info.get('duration'),
-                        thumbnail_url=self._thumbnail_url(video_id),
-                    ),
-                    signals=RankingSignals(
-                        position=position,
-                        popularity=video_info.get('view_count') or 0,
-                        verified=bool(video_info.get('channel_is_verified')),
-                    ),
-                ))
+        search_query = f"ytsearch{min(depth, SEARCH_FETCH_LIMIT)}:{self._enhance_query(query)}"
+        # Options are rebuilt per search, so a changed proxy reaches the next
+        # search through the client fingerprint rather than a restart.
+        search_results = SEARCH_CLIENTS.search(self._get_ydl_opts(), search_query)
+
+        if not search_results or 'entries' not in search_results:
+            return []
+
+        for position, video_info in enumerate(search_results['entries']):
+            if not video_info:
+                continue
+
+            video_id = video_info.get('id', '')
+            if not video_id or video_id in seen:
+                continue
+
+            if is_live(video_info):
+                continue
+
+            uploader = channel_name(video_info)
+            if self.allowed_channels and not self._is_allowed_channel(uploader):
+                continue
+
+            seen.add(video_id)
+            candidates.append(SearchCandidate(
+                entry=KaraokeEntry(
+                    id=video_id,
+                    title=video_info.get('title', 'Unknown Title'),
+                    artist=uploader,
+                    video_url=None,  # Loaded on demand
+                    source=self.provider_id,
+                    uploader=uploader,
+                    duration=video_info.get('duration'),
+                    thumbnail_url=self._thumbnail_url(video_id),
+                ),
+                signals=RankingSignals(
+                    position=position,
+                    popularity=video_info.get('view_count') or 0,
+                    verified=bool(video_info.get('channel_is_verified')),
+                ),
+            ))
 
         return candidates
 
-    async def search(self, query: str) -> list[SearchCandidate]:
+    async def search(self, query: str, depth: int) -> list[SearchCandidate]:
         """
         Search in a worker thread, bounded by SEARCH_TIMEOUT_SECONDS.
 
@@ -352,7 +1104,7 @@ class YTKaraokeSourceProvider(KaraokeSourceProvider):
         """
         try:
             candidates = await asyncio.wait_for(
-                asyncio.to_thread(self._search_videos, query),
+                asyncio.get_running_loop().run_in_executor(SEARCH_EXECUTOR, self._search_videos, query, depth),
                 timeout=config.SEARCH_TIMEOUT_SECONDS,
             )
         except asyncio.TimeoutError:
@@ -377,14 +1129,89 @@ class YTKaraokeSourceProvider(KaraokeSourceProvider):
             return VideoURLResult.unavailable()
 
         youtube_url = f"https://www.youtube.com/watch?v={entry.id}"
-        outcome = await self._get_raw_video_url(youtube_url)
+        return self._video_url_result(await self._get_raw_video_url(youtube_url))
+
+    async def get_video_urls(self, entries: list[KaraokeEntry]) -> list[VideoURLResult]:
+        """
+        Extract up to EXTRACT_BATCH_MAX videos per yt-dlp run. A video the run
+        gave a verdict on is settled by it; one that failed for environmental
+        reasons, or with the whole run, goes through get_video_url's retries.
+        """
+        results: list[Optional[VideoURLResult]] = [None] * len(entries)
+        pending = [index for index, entry in enumerate(entries) if entry.id]
+        for index, entry in enumerate(entries):
+            if not entry.id:
+                results[index] = VideoURLResult.unavailable()
+
+        retry: list[int] = []
+        for start in range(0, len(pending), EXTRACT_BATCH_MAX):
+            batch = pending[start:start + EXTRACT_BATCH_MAX]
+            if not self.extract_breaker.allow():
+                for index in batch:
+                    results[index] = VideoURLResult.failed()
+                continue
+
+            timeout = self.extract_breaker.timeout() + EXTRACT_BATCH_SECONDS_PER_URL * (len(batch) - 1)
+            try:
+                infos = await ytdlp_json_many(EXTRACT_ARGS, [entries[i].id for i in batch], timeout=timeout, lean=True)
+            except asyncio.CancelledError:
+                self.extract_breaker.abandon()
+                raise
+            except YtdlpMissing as e:
+                self.extract_breaker.record_failure()
+                self.health.record_failure(str(e), fatal=True)
+                for index in batch:
+                    results[index] = VideoURLResult.failed()
+                continue
+            except YtdlpError as e:
+                self.extract_breaker.record_failure()
+                print(f"[YTDLP] Batch of {len(batch)} failed, resolving one by one: {e.details}")
+                retry.extend(batch)
+                continue
+
+            # A batch's time is not one extraction's, so it is not a sample.
+            if any(not isinstance(info, YtdlpError) or not self._is_environmental(info) for info in infos):
+                self.extract_breaker.record_success()
+            else:
+                self.extract_breaker.record_failure()
+
+            for index, info in zip(batch, infos):
+                if isinstance(info, YtdlpError):
+                    if self._is_environmental(info):
+                        retry.append(index)
+                        continue
+                    # A verdict on the video, which says the extractor works.
+                    self.health.record_ok()
+                    print(f"[YTDLP] No video URL for {entries[index].id}: {info.details}")
+                    results[index] = VideoURLResult.unavailable()
+                else:
+                    self.health.record_ok()
+                    results[index] = self._video_url_result(ExtractionOutcome(select_stream_url(info), False))
+
+        # One after another: the service holds one extraction slot for the
+        # whole batch, and running them at once would spend several.
+        for index in retry:
+            results[index] = await self.get_video_url(entries[index])
 
+        return results
+
+    def _video_url_result(self, outcome: ExtractionOutcome) -> VideoURLResult:
         if outcome.url:
-            # YouTube's signed URLs outlive a sitting.
-            return VideoURLResult.resolved(outcome.url, cache_ttl_seconds=4 * 3600)
+            expires_at = stream_url_expires_at(outcome.url)
+            if expires_at is None:
+                return VideoURLResult.resolved(outcome.url, cache_ttl_seconds=STREAM_URL_DEFAULT_TTL_SECONDS)
+
+            ttl = int(expires_at - time.time() - STREAM_URL_EXPIRY_MARGIN_SECONDS)
+            if ttl <= 0:
+                # Good to play now, too close to expiry to hand out again.
+                return VideoURLResult(video_url=outcome.url, cacheable=False)
+            return VideoURLResult.resolved(outcome.url, cache_ttl_seconds=ttl)
 
         return VideoURLResult.failed() if outcome.environmental_failure else VideoURLResult.unavailable()
 
+    def video_url_expires_at(self, video_url: str) -> Optional[float]:
+        return stream_url_expires_at(video_url)
+
     @staticmethod
     def _is_environmental(error: Exception) -> bool:
         """
@@ -417,20 +1244,29 @@ class YTKaraokeSourceProvider(KaraokeSourceProvider):
         Every attempt is bounded by the wrapper's timeout, so a hung extraction
         releases the request instead of pinning it until yt-dlp gives up on its
         own. yt-dlp's internal retries are kept low for the same reason.
+
+        The timeout is the extract breaker's, sized from how long extractions
+        have been taking, and an open breaker ends the retries early. An
+        attempt that is slow to answer may be hedged; see _extract_hedged.
         """
         for attempt in range(max_retries + 1):
+            if not self.extract_breaker.allow():
+                print(f"[YTDLP] Extraction circuit open, not resolving {youtube_url}")
+                return ExtractionOutcome(None, True)
+
+            started = time.monotonic()
             try:
-                info = await ytdlp_json([
-                    "--format", FORMAT_SELECTOR,
-                    "--socket-timeout", "15",
-                    "--retries", "1",
-                    "--extractor-args", f"youtube:player_client={PLAYER_CLIENT}",
-                    youtube_url,
-                ])
+                info = await self._extract_hedged(youtube_url)
+                self.extract_breaker.record_success(time.monotonic() - started)
                 self.health.record_ok()
                 return ExtractionOutcome(select_stream_url(info), False)
 
+            except asyncio.CancelledError:
+                self.extract_breaker.abandon()
+                raise
+
             except YtdlpMissing as e:
+                self.extract_breaker.record_failure()
                 self.health.record_failure(str(e), fatal=True)
                 print(f"[YTDLP] {e}")
                 return ExtractionOutcome(None, True)
@@ -438,6 +1274,11 @@ class YTKaraokeSourceProvider(KaraokeSourceProvider):
             except Exception as e:
                 environmental = self._is_environmental(e)
                 detail = e.details if isinstance(e, YtdlpError) else str(e)
+                if environmental:
+                    self.extract_breaker.record_failure()
+                else:
+                    # A verdict on the video took as long as an answer does.
+                    self.extract_breaker.record_success(time.monotonic() - started)
 
                 if attempt < max_retries and self._should_retry(e):
                     delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
@@ -458,3 +1299,58 @@ class YTKaraokeSourceProvider(KaraokeSourceProvider):
                 return ExtractionOutcome(None, environmental)
 
         return ExtractionOutcome(None, True)
+
+    async def _extract_hedged(self, youtube_url: str) -> dict:
+        """
+        One extraction attempt. If it has not answered by the p90 of recent
+        extractions, a second starts alongside it on another player client,
+        and the first to return info is used. The other is cancelled, which
+        kills its process. Raises only once both have failed.
+
+        Hedges are capped process wide by HEDGES, start only on an idle
+        worker, and only a closed breaker hedges: a failing source is not
+        asked twice.
+        """
+        timeout = self.extract_breaker.timeout()
+        first = asyncio.ensure_future(ytdlp_json([*EXTRACT_ARGS, youtube_url], timeout=timeout, lean=True))
+        hedge: Optional[asyncio.Future] = None
+        try:
+            delay = self.extract_breaker.percentile(HEDGE_LATENCY_PERCENTILE)
+            if delay is None or not HEDGES.enabled or self.extract_breaker.state != "closed":
+                return await first
+
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                return await first
+            if WORKER_POOL.enabled and not WORKER_POOL.has_idle_worker():
+                # Waiting for a worker would outlast the attempt it races, or
+                # take one from an extraction the scheduler let in first.
+                HEDGES.stats["skipped_no_worker"] += 1
+                return await first
+            if not HEDGES.try_acquire():
+                return await first
+
+            print(f"[YTDLP] No answer for {youtube_url} after {delay:.1f}s, hedging on {HEDGE_PLAYER_CLIENT}")
+            hedge = asyncio.ensure_future(ytdlp_json([*HEDGE_EXTRACT_ARGS, youtube_url], timeout=timeout, lean=True))
+            # Held until the hedge has actually stopped, kill included.
+            hedge.add_done_callback(lambda _: HEDGES.release())
+            return await self._first_success(first, hedge)
+        finally:
+            for task in (first, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    async def _first_success(self, first: asyncio.Future, hedge: asyncio.Future) -> dict:
+        pending = {first, hedge}
+        errors: dict[asyncio.Future, BaseException] = {}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    HEDGES.stats["hedge_won" if task is hedge else "first_won"] += 1
+                    return task.result()
+                errors[task] = task.exception()
+
+        # Both failed. A verdict on the video says more than a timeout does.
+        verdicts = [errors[task] for task in (first, hedge) if not self._is_environmental(errors[task])]
+        raise (verdicts or [errors[first]])[0]
@@ -0,0 +1,142 @@
+"""
+Updates yt-dlp in the background, side by side with the one installed with
+the server.
+
+YouTube changes under yt-dlp often enough that a few weeks' old release can
+stop resolving, so a long lived deployment wants the current one. Installing
+it before the server starts keeps every start waiting on PyPI; installing it
+over the running one can leave extractions importing half a package. Instead
+pip installs the latest release into a directory of its own, nothing running
+touches it while it does, and it is only switched to once it has extracted a
+canary video. Extraction processes started after the switch import it through
+PYTHONPATH; the in-process library that searches keeps the installed version
+until a restart.
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+UPDATE_PACKAGES = ("yt-dlp", "yt-dlp-ejs")
+
+# Each update gets a directory under here, in one per server process, so
+# processes sharing a host never remove an install another is running.
+UPDATES_ROOT = Path(tempfile.gettempdir()) / "karaoke-yt-dlp-updates"
+
+PIP_TIMEOUT_SECONDS = 300.0
+
+
+class YtdlpInstall(NamedTuple):
+    # Where pip put it, or None for the yt-dlp installed with the server.
+    path: Optional[str] = None
+    version: Optional[str] = None
+
+    def argv(self, binary: str) -> list[str]:
+        """How to run this install's command line."""
+        return [sys.executable, "-m", "yt_dlp"] if self.path else [binary]
+
+    def apply(self, env: dict) -> dict:
+        """The environment for a process that should import this install."""
+        if self.path:
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, (self.path, env.get("PYTHONPATH"))))
+        return env
+
+
+class YtdlpUpdater:
+    """
+    Holds the install extractions run, and replaces it with a newer one that
+    passed validation. The switch is one assignment of `active`, which every
+    process spawn reads once, so a process runs one install or the other.
+
+    `validate` runs the canary with a candidate install and returns its
+    version, raising if it did not resolve.
+    """
+
+    def __init__(
+        self,
+        installed_version: Optional[str],
+        validate: Callable[[YtdlpInstall], Awaitable[str]],
+        root: Path = UPDATES_ROOT,
+    ):
+        self.active = YtdlpInstall(version=installed_version)
+        self.installed_version = installed_version
+        self.validate = validate
+        self.root = root / str(os.getpid())
+        self.status: dict = {"state": "idle", "checked_at": None, "candidate_version": None, "error": None}
+
+    async def update(self) -> bool:
+        """Install the latest release beside the active one; True if it was switched to."""
+        self._prune()
+        self.status.update(state="installing", error=None)
+        path = self.root / str(int(time.time() * 1000))
+        try:
+            await self._pip_install(path)
+            self.status["state"] = "validating"
+            version = await self.validate(YtdlpInstall(str(path)))
+        except asyncio.CancelledError:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        except Exception as e:
+            shutil.rmtree(path, ignore_errors=True)
+            self.status.update(state="failed", checked_at=time.time(), error=str(e))
+            print(f"[YTDLP] Update failed, staying on {self.active.version}: {e}")
+            return False
+
+        self.status.update(checked_at=time.time(), candidate_version=version)
+        if version == self.active.version:
+            shutil.rmtree(path, ignore_errors=True)
+            self.status["state"] = "current"
+            print(f"[YTDLP] yt-dlp {version} is the latest release")
+            return False
+
+        previous = self.active
+        self.active = YtdlpInstall(str(path), version)
+        self.status["state"] = "switched"
+        print(f"[YTDLP] Switched from yt-dlp {previous.version} to {version}")
+        return True
+
+    async def _pip_install(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "pip", "install",
+            "--quiet", "--no-cache-dir", "--disable-pip-version-check", "--upgrade",
+            "--target", str(path), *UPDATE_PACKAGES,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            _, stderr = await asyncio.wait_for(proc.communicate(), timeout=PIP_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            proc.kill()
+            await proc.wait()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise RuntimeError(f"pip did not finish in {PIP_TIMEOUT_SECONDS:g}s")
+
+        if proc.returncode != 0:
+            detail = stderr.decode("utf-8", errors="replace").strip().splitlines()
+            raise RuntimeError(f"pip exited with code {proc.returncode}: {detail[-1] if detail else ''}")
+
+    def _prune(self):
+        """
+        Remove update directories but the active one. Done before an update
+        rather than after a switch, by when nothing still runs from them.
+        """
+        if not self.root.is_dir():
+            return
+        for entry in self.root.iterdir():
+            if str(entry) != self.active.path:
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def snapshot(self) -> dict:
+        return {
+            "active_version": self.active.version,
+            "installed_version": self.installed_version,
+            "side_by_side": self.active.path is not None,
+            **self.status,
+        }
@@ -0,0 +1,116 @@
+"""
+A long lived yt-dlp extraction process, driven by YtdlpWorkerPool.
+
+Importing yt-dlp and setting up its extractors costs more than a second, which
+a process per URL pays on every song. A worker pays it once, then takes jobs as
+JSON lines on stdin and answers each with one JSON line on stdout.
+
+A job carries yt-dlp command line arguments, the same contract the CLI wrapper
+uses, turned into options by yt_dlp.parse_options:
+
+    {"id": 1, "args": ["--format", "best", "https://..."]}
+    {"id": 1, "ok": true, "info": {...}}
+    {"id": 1, "ok": false, "error": "ERROR: [youtube] ...: Video unavailable"}
+
+A job with "batch": true may name several URLs, and is answered with one
+result per URL, in order, under "results". Each URL fails on its own.
+
+With --print among the arguments, "info" is the printed template parsed as
+JSON, as the CLI would print it: the lean output, a few fields of the info
+rather than all of it.
+
+{"id": 2, "version": true} answers with the yt-dlp version instead.
+
+Only the parent decides when a job has taken too long; it kills the whole
+process, which is the one way to stop an extraction that has hung.
+"""
+
+import json
+import os
+import sys
+
+import yt_dlp
+
+
+class ErrorLog:
+    """
+    Collects what yt-dlp reports as errors, which the CLI would print to
+    stderr. With the default ignoreerrors an extraction can fail without
+    raising, and this is then all there is to say why.
+    """
+
+    def __init__(self):
+        self.errors: list[str] = []
+
+    def debug(self, message: str):
+        pass
+
+    def info(self, message: str):
+        pass
+
+    def warning(self, message: str):
+        pass
+
+    def error(self, message: str):
+        self.errors.append(message)
+
+
+def _extract(args: list[str], batch: bool) -> dict:
+    parsed = yt_dlp.parse_options(["--skip-download", *args])
+    if not parsed.urls or (len(parsed.urls) > 1 and not batch):
+        raise ValueError(f"Expected one URL, got {len(parsed.urls)}")
+
+    # Filled in here rather than printed, since stdout belongs to the protocol.
+    ydl_opts = dict(parsed.ydl_opts)
+    templates = (ydl_opts.pop("forceprint", None) or {}).get("video") or []
+
+    log = ErrorLog()
+    results = []
+    # One YoutubeDL for the whole batch, so its setup is paid once.
+    with yt_dlp.YoutubeDL({**ydl_opts, "logger": log}) as ydl:
+        for url in parsed.urls:
+            log.errors.clear()
+            try:
+                info = ydl.extract_info(url, download=False)
+            except yt_dlp.utils.DownloadError as e:
+                results.append({"ok": False, "error": "\n".join(log.errors) or str(e)})
+                continue
+
+            if info is None:
+                results.append({"ok": False, "error": "\n".join(log.errors) or "No information extracted"})
+            elif templates:
+                results.append({"ok": True, "info": json.loads(ydl.evaluate_outtmpl(templates[-1], info))})
+            else:
+                # What --dump-single-json prints, so both paths hand back one shape.
+                results.append({"ok": True, "info": ydl.sanitize_info(info)})
+
+    return {"ok": True, "results": results} if batch else results[0]
+
+
+def _handle(job: dict) -> dict:
+    if job.get("version"):
+        return {"ok": True, "version": yt_dlp.version.__version__}
+
+    try:
+        return _extract(job["args"], bool(job.get("batch")))
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def main():
+    # yt-dlp writes to stdout in places even when quiet. The protocol keeps the
+    # real stdout to itself and everything else is sent to stderr.
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        reply = {"id": job.get("id"), **_handle(job)}
+        protocol.write(json.dumps(reply, ensure_ascii=False) + "\n")
+        protocol.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from typing import Any, Dict, Literal, Optional
 from pydantic import BaseModel, Field, validator
 from core.search import KaraokeEntry
 from core.player import DisplayPlayerState
+from services.karaoke_service import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
 
 MAX_NICKNAME_LENGTH = 14
 
@@ -31,6 +32,14 @@ class EntryIDPayload(BaseModel):
     """Payload with entry_id field"""
     entry_id: str = Field(..., min_length=1)
 
+class SearchPayload(BaseModel):
+    """Streamed search command payload"""
+    query: str = Field(..., min_length=1, max_length=200)
+    limit: int = Field(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT)
+    # Echoed on every frame, so a client can drop frames for a query it has
+    # already moved on from. One is made up when not given.
+    search_id: Optional[str] = Field(None, max_length=64)
+
 class SetVolumePayload(BaseModel):
     """Set volume command payload"""
     volume: float = Field(..., ge=0.0, le=1.0)
@@ -107,6 +116,7 @@ COMMAND_PAYLOAD_MAP = {
     "remove_song": EntryIDPayload,
     "queue_next_song": EntryIDPayload,
     "refresh_video_url": EntryIDPayload,
+    "search": SearchPayload,
     "set_volume": SetVolumePayload,
     "set_autoplay": SetAutoplayPayload,
     "play_next": PlayNextPayload,
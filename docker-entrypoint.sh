@@ -1,11 +1,7 @@
 #!/bin/sh
 set -e
 
-if [ "${YTDLP_AUTO_UPDATE:-0}" = "1" ]; then
-    echo "[STARTUP] Refreshing yt-dlp..."
-    if ! pip install --no-cache-dir --upgrade yt-dlp yt-dlp-ejs; then
-        echo "[STARTUP] yt-dlp refresh failed, continuing with the image version"
-    fi
-fi
+# YTDLP_AUTO_UPDATE=1 is handled by the server, which starts on the image's
+# yt-dlp and installs the latest release beside it in the background.
 
 exec "$@"
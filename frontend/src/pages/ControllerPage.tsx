@@ -253,8 +253,9 @@ function SongSelectTab() {
 
   const { data: pages, error, isLoading, isValidating, size, setSize } = useSearch(query);
   const entries = useMemo(() => pages?.flatMap((page) => page.entries) ?? [], [pages]);
-  const total = pages?.[pages.length - 1]?.total ?? 0;
-  const hasMore = entries.length > 0 && entries.length < total;
+  const lastPage = pages?.[pages.length - 1];
+  const total = lastPage?.total ?? 0;
+  const hasMore = entries.length > 0 && (entries.length < total || lastPage?.complete === false);
   // The page just asked for has not arrived while its slot is still empty.
   const isLoadingMore = pages !== undefined && size > 0 && pages[size - 1] === undefined;
   const isFetching = isLoading || (isValidating && !isLoadingMore);
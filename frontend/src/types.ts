@@ -11,7 +11,9 @@ export interface KaraokeEntry {
 
 export interface KaraokeSearchResult {
   entries: KaraokeEntry[];
+  // Ranked so far. Until complete, asking past it fetches deeper.
   total: number;
+  complete: boolean;
 }
 
 export interface VideoURLResponse {